@@ -1,6 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, UploadedLog
+from .models import AnalysisJob, AnalysisSummary, CustomUser, LogBlob, LogSegment, LogStatistics, UploadedLog
 
 admin.site.register(CustomUser, UserAdmin)
 admin.site.register(UploadedLog)
+admin.site.register(AnalysisJob)
+admin.site.register(AnalysisSummary)
+admin.site.register(LogSegment)
+admin.site.register(LogStatistics)
+admin.site.register(LogBlob)
@@ -0,0 +1,558 @@
+"""
+Vectorized helpers for the 1553B periodicity analysis
+"""
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+# Bump whenever analysis output changes; cached results are keyed on it
+ENGINE_VERSION = 4
+
+NS_PER_SECOND = 1_000_000_000
+DAY_NS = 86_400 * NS_PER_SECOND
+
+# Offsets of the fixed "HH:MM:SS.ffffff" layout
+_CLOCK_DIGITS = [0, 1, 3, 4, 6, 7]
+_CLOCK_SCALE = np.array([
+    10 * 3600, 3600, 10 * 60, 60, 10, 1
+], dtype=np.int64) * NS_PER_SECOND
+
+ParsedTimestamps = namedtuple('ParsedTimestamps', ['ns', 'valid', 'missing'])
+
+
+def _as_byte_strings(values):
+    """Render a column as a fixed-width bytes array (one C-level pass)"""
+    text = pd.Series(values, copy=False).astype(str).to_numpy()
+    try:
+        return text.astype('S')
+    except UnicodeEncodeError:
+        return None
+
+
+def _parse_clock_bytes(raw):
+    """
+    Parse "HH:MM:SS" / "HH:MM:SS.f{1,6}" byte strings without per-row Python.
+    Each distinct string width is decoded as a uint8 matrix in one shot.
+    """
+    n = len(raw)
+    ns = np.zeros(n, dtype=np.int64)
+    ok = np.zeros(n, dtype=bool)
+    if n == 0 or raw.dtype.itemsize < 8:
+        return ns, ok
+
+    width = raw.dtype.itemsize
+    matrix = raw.view(np.uint8).reshape(n, width)
+    lengths = np.char.str_len(raw)
+
+    for length in np.unique(lengths):
+        if length < 8 or length == 9 or length > 15:
+            continue
+        rows = np.flatnonzero(lengths == length)
+        chars = matrix[rows, :length]
+        # int16 keeps the per-character temporary at 2 bytes a cell
+        digits = chars.astype(np.int16) - 48
+
+        fine = (chars[:, 2] == 58) & (chars[:, 5] == 58)  # ':'
+        digit_cols = list(_CLOCK_DIGITS)
+        if length > 8:
+            fine &= chars[:, 8] == 46  # '.'
+            digit_cols += list(range(9, length))
+        fine &= ((digits[:, digit_cols] >= 0) & (digits[:, digit_cols] <= 9)).all(axis=1)
+
+        values = digits[:, _CLOCK_DIGITS].astype(np.int64) @ _CLOCK_SCALE
+        if length > 8:
+            places = length - 9
+            scale = 10 ** np.arange(8, 8 - places, -1, dtype=np.int64)
+            values += digits[:, 9:length].astype(np.int64) @ scale
+
+        # Same bounds strptime enforces for %H/%M/%S
+        fine &= (values < DAY_NS) & (digits[:, 3] < 6) & (digits[:, 6] < 6)
+
+        ns[rows[fine]] = values[fine]
+        ok[rows[fine]] = True
+
+    return ns, ok
+
+
+def parse_timestamps(values):
+    """
+    Parse an entire timestamp column into int64 nanoseconds since midnight.
+
+    Rows rendered as "0" (empty cells after fillna) are reported as missing.
+    Backward jumps of more than half a day are treated as a midnight rollover.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    raw = _as_byte_strings(values)
+
+    if raw is None:
+        ns = np.zeros(n, dtype=np.int64)
+        valid = np.zeros(n, dtype=bool)
+        missing = pd.Series(values, copy=False).astype(str).to_numpy() == '0'
+    else:
+        missing = raw == b'0'
+        ns, valid = _parse_clock_bytes(raw)
+
+    # Anything the fixed layout did not cover goes through pandas' strptime
+    leftover = np.flatnonzero(~valid & ~missing)
+    if len(leftover):
+        text = pd.Series(values[leftover]).astype(str)
+        parsed = pd.to_datetime(text, format='%H:%M:%S.%f', errors='coerce')
+        hit = parsed.notna().to_numpy()
+        if hit.any():
+            stamps = parsed[hit]
+            ns[leftover[hit]] = (stamps - stamps.dt.normalize()).to_numpy().astype(np.int64)
+            valid[leftover[hit]] = True
+
+    usable = np.flatnonzero(valid & ~missing)
+    ns[usable] = unroll_midnight(ns[usable])
+
+    return ParsedTimestamps(ns, valid, missing)
+
+
+def unroll_midnight(ns):
+    """
+    Add a day to everything after each backward jump of more than half a
+    day, so a capture running past 00:00 keeps increasing offsets.
+    """
+    if len(ns) < 2:
+        return ns
+    steps = np.diff(ns)
+    rollovers = np.concatenate(([0], np.cumsum(steps < -DAY_NS // 2)))
+    if rollovers[-1]:
+        ns = ns + rollovers * DAY_NS
+    return ns
+
+
+# Timestamp columns in the order timestamps_from_frame looks for them
+TIMESTAMP_COLUMNS = ('timestamp_ns', 'timestamp', 'Timestamp')
+
+
+def timestamps_from_frame(df):
+    """
+    Locate and parse the timestamp column of a frame.
+    Binary captures provide integer ``timestamp_ns`` directly.
+    """
+    if 'timestamp_ns' in df.columns:
+        ns = unroll_midnight(df['timestamp_ns'].to_numpy(dtype=np.int64))
+        present = np.ones(len(ns), dtype=bool)
+        return ns, ParsedTimestamps(ns, present, ~present)
+
+    if 'timestamp' in df.columns:
+        timestamp_col = 'timestamp'
+    elif 'Timestamp' in df.columns:
+        timestamp_col = 'Timestamp'
+    else:
+        raise Exception("Required column 'timestamp' or 'Timestamp' not found in file.")
+
+    # Performance: Parse the whole column once instead of strptime per row
+    raw_timestamps = df[timestamp_col].to_numpy()
+    return raw_timestamps, parse_timestamps(raw_timestamps)
+
+
+def group_seconds(parsed, positions, fallback_values):
+    """
+    Seconds elapsed since the first timestamp of a group.
+
+    Mirrors the legacy behaviour: if any present timestamp in the group fails
+    to parse, the raw values are read as plain numbers instead.
+    """
+    present = positions[~parsed.missing[positions]]
+    if parsed.valid[present].all():
+        if len(present) == 0:
+            return np.array([], dtype=np.float64)
+        offsets = parsed.ns[present]
+        return (offsets - offsets[0]) / NS_PER_SECOND
+
+    seconds = pd.to_numeric(fallback_values, errors='coerce')
+    return seconds[seconds != 0]
+
+
+def group_codes(frame, keys):
+    """
+    Dense group number of every row for a multi-column grouping.
+
+    Each key column is factorized (hash based, sorted labels) and the codes
+    are folded into one compound integer, re-densified after every column
+    so it never overflows. Returns (codes, key_values): codes are in sorted
+    key order, -1 for rows with a missing key; key_values holds one tuple
+    of key values per group.
+    """
+    n = len(frame)
+    codes = np.zeros(n, dtype=np.int64)
+    missing = np.zeros(n, dtype=bool)
+    table = np.zeros((1, 0), dtype=np.int64)
+    labels = []
+
+    for name in keys:
+        column, uniques = pd.factorize(frame[name], sort=True)
+        missing |= column < 0
+        width = max(len(uniques), 1)
+        compound = codes * width + np.maximum(column, 0)
+
+        space = len(table) * width
+        if space <= max(n, 1 << 16):
+            # Performance: Dense remap through bincount, no sort needed
+            occupied = np.bincount(compound[~missing], minlength=space) > 0
+            present = np.flatnonzero(occupied)
+            codes = np.maximum(np.cumsum(occupied) - 1, 0)[compound]
+        else:
+            present = np.unique(compound[~missing])
+            codes = np.minimum(np.searchsorted(present, compound), max(len(present) - 1, 0))
+        table = np.column_stack((table[present // width], present % width))
+        labels.append(np.asarray(uniques, dtype=object))
+
+    codes[missing] = -1
+    columns = [labels[i][table[:, i]].tolist() for i in range(len(keys))]
+    return codes, list(zip(*columns)) if columns else []
+
+
+GroupedIntervals = namedtuple('GroupedIntervals', [
+    'count', 'mean', 'minimum', 'maximum', 'std',
+    'seconds', 'row_bounds', 'intervals', 'interval_bounds', 'origin',
+])
+
+
+def grouped_intervals(codes, ns, n_groups):
+    """
+    Interval statistics of every group in one pass.
+
+    Rows are stably sorted by group code once, so each group becomes a
+    contiguous run in file order; intervals are a single np.diff masked at
+    group boundaries and per-group statistics come from bincount/reduceat.
+    ``seconds[row_bounds[g]:row_bounds[g + 1]]`` and
+    ``intervals[interval_bounds[g]:interval_bounds[g + 1]]`` slice one group;
+    ``origin[g]`` is the group's first timestamp in ns.
+    """
+    # Performance: Small code ranges use numpy's radix sort (stable, O(n))
+    narrow = np.uint16 if n_groups <= np.iinfo(np.uint16).max else np.int64
+    order = np.argsort(codes.astype(narrow, copy=False), kind='stable')
+    codes = codes[order]
+    ns = ns[order]
+    groups = np.arange(n_groups + 1)
+
+    row_bounds = np.searchsorted(codes, groups)
+    sizes = np.diff(row_bounds)
+    occupied = sizes > 0
+    # Seconds elapsed since each group's first timestamp
+    first = np.zeros(n_groups, dtype=np.int64)
+    first[occupied] = ns[row_bounds[:-1][occupied]]
+    seconds = (ns - np.repeat(first, sizes)) / NS_PER_SECOND
+
+    steps = np.diff(seconds)
+    keep = (codes[1:] == codes[:-1]) & (steps != 0)  # Remove zero intervals
+    intervals = steps[keep]
+    owner = codes[1:][keep]
+    interval_bounds = np.searchsorted(owner, groups)
+
+    count = np.bincount(owner, minlength=n_groups)
+    divisor = np.maximum(count, 1)
+    mean = np.bincount(owner, weights=intervals, minlength=n_groups) / divisor
+    deviation = intervals - mean[owner]
+    std = np.sqrt(np.bincount(owner, weights=deviation * deviation, minlength=n_groups) / divisor)
+
+    minimum = np.zeros(n_groups)
+    maximum = np.zeros(n_groups)
+    filled = count > 0
+    if filled.any():
+        starts = interval_bounds[:-1][filled]
+        minimum[filled] = np.minimum.reduceat(intervals, starts)
+        maximum[filled] = np.maximum.reduceat(intervals, starts)
+
+    return GroupedIntervals(
+        count, mean, minimum, maximum, std,
+        seconds, row_bounds, intervals, interval_bounds, first,
+    )
+
+
+def grouped_percentiles(intervals, interval_bounds, qs):
+    """
+    Exact quantiles `qs` of every group's intervals (linear interpolation,
+    as np.quantile), from one sort of all intervals by (group, value).
+    Returns an (n_groups x len(qs)) array, NaN for groups without intervals.
+    """
+    count = np.diff(interval_bounds)
+    n_groups = len(count)
+    result = np.full((n_groups, len(qs)), np.nan)
+    filled = count > 0
+    if not filled.any():
+        return result
+    owner = np.repeat(np.arange(n_groups), count)
+    ordered = intervals[np.lexsort((intervals, owner))]
+
+    start = interval_bounds[:-1][filled]
+    last = count[filled] - 1
+    for column, q in enumerate(qs):
+        rank = q * last
+        low = np.floor(rank).astype(np.int64)
+        high = np.minimum(low + 1, last)
+        fraction = rank - low
+        result[filled, column] = ordered[start + low] * (1 - fraction) + ordered[start + high] * fraction
+    return result
+
+
+def minmax_downsample(y, points):
+    """
+    Keep the minimum and maximum of each bucket, in occurrence order.
+    Buckets are equal-width rows of a NaN-padded matrix, so the whole
+    reduction is a couple of vectorized passes.
+    """
+    n = len(y)
+    if n <= points:
+        return np.arange(n)
+
+    buckets = max(points // 2, 1)
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    matrix = padded.reshape(buckets, size)
+
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.nanargmin(matrix, axis=1)
+    highs = offsets + np.nanargmax(matrix, axis=1)
+    return np.unique(np.concatenate((lows, highs)))
+
+
+def lttb_downsample(y, points):
+    """
+    Largest-Triangle-Three-Buckets selection over x = occurrence index.
+    One pass over the data: each bucket is scored with array arithmetic.
+    """
+    n = len(y)
+    if n <= points or points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(points - 2):
+        start, stop = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_start = stop if stop < n else n - 1
+        avg_x = (next_start + max(next_stop, next_start + 1) - 1) / 2.0
+        avg_y = np.mean(y[next_start:max(next_stop, next_start + 1)])
+
+        xs = np.arange(start, stop)
+        area = np.abs(
+            (previous - avg_x) * (y[start:stop] - y[previous])
+            - (previous - xs) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+DOWNSAMPLERS = {
+    'lttb': lttb_downsample,
+    'minmax': minmax_downsample,
+}
+
+
+def interval_series(seconds, points, method='lttb'):
+    """Downsampled (occurrence, interval) series for client-side plotting"""
+    if len(seconds) < 2:
+        return None
+    intervals = np.diff(seconds)
+    keep = DOWNSAMPLERS[method](intervals, points)
+    return {
+        'x': keep.tolist(),
+        'y': intervals[keep].tolist(),
+        'total_points': len(intervals),
+    }
+
+
+# Duration suffixes accepted for time-based rolling windows
+ROLLING_UNITS = {'ms': 1e-3, 's': 1.0, 'min': 60.0}
+_ROLLING_SPEC = re.compile(r'^(\d+(?:\.\d+)?)(ms|s|min)?$')
+
+
+def parse_rolling_window(spec):
+    """
+    '1s' / '250ms' / '2min' as a time window, a bare integer as a window
+    of N messages. Returns {'size', 'unit'} or None if invalid.
+    """
+    match = _ROLLING_SPEC.match(str(spec).strip().lower())
+    if match is None:
+        return None
+    value, suffix = match.groups()
+    if suffix is None:
+        if '.' in value or int(value) < 2:
+            return None
+        return {'size': int(value), 'unit': 'messages'}
+    seconds = float(value) * ROLLING_UNITS[suffix]
+    if seconds <= 0:
+        return None
+    return {'size': seconds, 'unit': 'seconds'}
+
+
+def rolling_jitter(seconds, window, points):
+    """
+    Interval statistics over a sliding window, sampled at no more than
+    `points` window positions. `window` comes from parse_rolling_window.
+
+    Window sums come from differences of cumulative sums (centred on the
+    overall mean so the variance stays accurate), so the cost does not
+    depend on the window size; min/max use a strided view for message
+    windows and reduceat for time windows. ``x`` is the time of each
+    window's end in seconds since the group's first message.
+    """
+    seconds = np.asarray(seconds, dtype=np.float64)
+    if len(seconds) < 2:
+        return None
+    steps = np.diff(seconds)
+    keep = (steps != 0) & ~np.isnan(steps)  # Same intervals as the statistics
+    intervals = steps[keep]
+    times = seconds[1:][keep]
+    n = len(intervals)
+    if n == 0:
+        return None
+
+    if window['unit'] == 'messages':
+        size = min(window['size'], n)
+        positions = n - size + 1
+        # Performance: Adjacent windows until there are more than `points`
+        stride = max(size, -(-positions // points))
+        lo = np.arange(0, positions, stride)
+        hi = lo + size
+        windows = np.lib.stride_tricks.sliding_window_view(intervals, size)[::stride]
+        minimum = windows.min(axis=1)
+        maximum = windows.max(axis=1)
+    else:
+        size = window['size']
+        # Timestamps stepping backwards stay in the window of the message before
+        times = np.maximum.accumulate(times)
+        span = times[-1] - times[0]
+        count = int(min(points, max(1, np.ceil(span / size))))
+        ends = np.linspace(times[0] + size, max(times[-1], times[0] + size), count)
+        lo = np.searchsorted(times, ends - size, side='left')
+        hi = np.searchsorted(times, ends, side='right')
+        # Odd reduceat segments run between windows and are dropped; the
+        # NaN sentinel lets a window end at the last interval
+        padded = np.append(intervals, np.nan)
+        bounds = np.column_stack((lo, hi)).ravel()
+        minimum = np.minimum.reduceat(padded, bounds)[::2]
+        maximum = np.maximum.reduceat(padded, bounds)[::2]
+
+    centre = intervals.mean()
+    deviation = intervals - centre
+    sums = np.concatenate(([0.0], np.cumsum(deviation)))
+    squares = np.concatenate(([0.0], np.cumsum(deviation * deviation)))
+    counts = hi - lo
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shift = (sums[hi] - sums[lo]) / counts
+        variance = (squares[hi] - squares[lo]) / counts - shift * shift
+    empty = counts == 0
+    minimum = np.where(empty, np.nan, minimum)
+    maximum = np.where(empty, np.nan, maximum)
+
+    return {
+        'window': window['size'],
+        'unit': window['unit'],
+        'x': times[np.maximum(hi - 1, 0)].tolist() if window['unit'] == 'messages' else ends.tolist(),
+        'count': counts.tolist(),
+        'mean': (shift + centre).tolist(),
+        'std': np.sqrt(np.maximum(variance, 0)).tolist(),
+        'min': minimum.tolist(),
+        'max': maximum.tolist(),
+    }
+
+
+# Default multiple of the nominal period above which an interval is a gap
+DEFAULT_GAP_MULTIPLE = 1.5
+# Gaps listed individually per group; the totals always count every gap
+MAX_LISTED_GAPS = 1000
+
+
+def format_clock(ns):
+    """Nanoseconds since midnight as 'HH:MM:SS.ffffff' (wrapping at midnight)"""
+    micros = (int(ns) % DAY_NS) // 1000
+    seconds, micros = divmod(micros, 1_000_000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{micros:06d}"
+
+
+def infer_period(steps):
+    """Nominal period of a group: the median of its positive intervals"""
+    positive = steps[steps > 0]
+    return float(np.median(positive)) if len(positive) else None
+
+
+def find_gaps(steps, nominal, multiple):
+    """
+    Positions of the intervals longer than `multiple` nominal periods,
+    and how many messages each one is missing (0 for a late message).
+    """
+    late = np.flatnonzero(steps > multiple * nominal)
+    missed = np.maximum(np.rint(steps[late] / nominal).astype(np.int64) - 1, 0)
+    return late, missed
+
+
+def gap_summary(nominal, source, multiple, count, late, missed_total, listed):
+    """
+    Response entry of a gap detection. `listed` holds the first gaps as
+    (positions, times, durations, missed, timestamps) arrays.
+    """
+    positions, times, durations, missed, timestamps = listed
+    return {
+        'nominal_period': nominal,
+        'period_source': source,
+        'threshold': multiple * nominal,
+        'count': int(count),
+        'late': int(late),
+        'missed_messages': int(missed_total),
+        'positions': np.asarray(positions).tolist(),
+        'times': np.asarray(times).tolist(),
+        'timestamps': timestamps,
+        'durations': np.asarray(durations).tolist(),
+        'missed': np.asarray(missed).tolist(),
+        'truncated': bool(count > len(positions)),
+    }
+
+
+def detect_gaps(seconds, multiple, period=None, origin_ns=None, limit=MAX_LISTED_GAPS):
+    """
+    Every interval of one group longer than `multiple` times its nominal
+    period (supplied, or inferred as the median interval). Positions are
+    the occurrence of the late message within the group; times are
+    seconds since the group's first message, where the gap starts.
+    """
+    seconds = np.asarray(seconds, dtype=np.float64)
+    if len(seconds) < 2:
+        return None
+    steps = np.diff(seconds)
+    nominal = period or infer_period(steps)
+    if not nominal:
+        return None
+
+    # Performance: One comparison over the whole group, no per-interval Python
+    late, missed = find_gaps(steps, nominal, multiple)
+    shown = late[:limit]
+    timestamps = None
+    if origin_ns is not None:
+        starts = origin_ns + np.rint(seconds[shown] * NS_PER_SECOND).astype(np.int64)
+        timestamps = [format_clock(ns) for ns in starts]
+    return gap_summary(
+        nominal, 'inferred' if period is None else 'supplied', multiple,
+        len(late), len(late) - np.count_nonzero(missed), missed.sum(),
+        (shown + 1, seconds[shown], steps[shown], missed[:limit], timestamps),
+    )
+
+
+def histogram_bins(intervals):
+    """Raw histogram (same binning as the PNG renderer)"""
+    if len(intervals) < 1:
+        return None
+    counts, edges = np.histogram(intervals, bins=min(20, len(intervals)))
+    return {
+        'edges': edges.tolist(),
+        'counts': counts.tolist(),
+    }
@@ -0,0 +1,164 @@
+"""
+JWT authentication from signed token claims, without a user query per request.
+
+Tokens issued by `tokens_for_user` carry the profile fields the API reads
+(username, email, full_name, role, date_joined) next to simplejwt's
+password hash claim. A request's user is rebuilt from those claims as a
+deferred model instance: it filters and assigns foreign keys like the
+real row, and any other field is loaded on first access.
+
+Deactivation and revocation (a changed password) are checked against a
+per-user state of (is_active, password hash) cached for
+AUTH_USER_STATE_TTL seconds, dropped whenever the user row is saved.
+Profile changes reach the claims on the next token refresh.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import DEFERRED
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# User fields embedded in every token, in addition to the id
+CLAIM_FIELDS = ('username', 'email', 'full_name', 'role', 'date_joined')
+
+
+def user_claims(user):
+    claims = {field: getattr(user, field) for field in CLAIM_FIELDS}
+    claims['date_joined'] = user.date_joined.isoformat()
+    return claims
+
+
+def tokens_for_user(user):
+    """Refresh token carrying the user's claims; its access token inherits them"""
+    refresh = RefreshToken.for_user(user)
+    refresh[api_settings.REVOKE_TOKEN_CLAIM] = get_md5_hash_password(user.password)
+    for claim, value in user_claims(user).items():
+        refresh[claim] = value
+    # Performance: The user was just read, the first request needs no lookup
+    store_user_state(user)
+    return refresh
+
+
+def _state_key(user_id):
+    return f"auth_user_state_{user_id}"
+
+
+def _user_state(user):
+    return {'is_active': user.is_active, 'password': get_md5_hash_password(user.password)}
+
+
+def store_user_state(user):
+    try:
+        cache.set(_state_key(user.pk), _user_state(user), timeout=settings.AUTH_USER_STATE_TTL)
+    except Exception:
+        pass  # Continue even if cache fails
+
+
+def invalidate_user_state(user_id):
+    try:
+        cache.delete(_state_key(user_id))
+    except Exception:
+        pass
+
+
+def get_user_state(user_id):
+    """
+    (is_active, password hash) of a user, from the cache or one indexed
+    query. None if the user does not exist.
+    """
+    key = _state_key(user_id)
+    try:
+        state = cache.get(key)
+    except Exception:
+        state = None
+    if state is not None:
+        return state or None
+
+    row = get_user_model().objects.filter(pk=user_id).values('is_active', 'password').first()
+    # Deleted users are cached too, as False
+    state = {'is_active': row['is_active'], 'password': get_md5_hash_password(row['password'])} if row else False
+    try:
+        cache.set(key, state, timeout=settings.AUTH_USER_STATE_TTL)
+    except Exception:
+        pass
+    return state or None
+
+
+def check_user_state(state, token):
+    """Reject tokens of missing or inactive users and of changed passwords"""
+    if state is None:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    if not state['is_active']:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    if token.get(api_settings.REVOKE_TOKEN_CLAIM) != state['password']:
+        raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication whose user comes from the token claims plus the
+    cached user state. Tokens issued before the claims were added fall
+    back to the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if not all(field in validated_token for field in CLAIM_FIELDS):
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        check_user_state(get_user_state(user_id), validated_token)
+
+        known = {field: validated_token[field] for field in CLAIM_FIELDS}
+        known['date_joined'] = datetime.fromisoformat(known['date_joined'])
+        known[self.user_model._meta.pk.attname] = user_id
+        known['is_active'] = True
+        # Performance: A loaded-from-database instance, every other field deferred
+        fields = self.user_model._meta.concrete_fields
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS,
+            [field.attname for field in fields],
+            [known.get(field.attname, DEFERRED) for field in fields],
+        )
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that re-reads the user: the new access token carries the
+    current profile claims, and refresh tokens of a deactivated user or
+    of an old password are refused.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        state = _user_state(user)
+        if api_settings.REVOKE_TOKEN_CLAIM in refresh.payload:
+            check_user_state(state, refresh.payload)
+
+        # Tokens issued before the claims were added pick them up here
+        refresh[api_settings.REVOKE_TOKEN_CLAIM] = state['password']
+        for claim, value in user_claims(user).items():
+            refresh[claim] = value
+        store_user_state(user)
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
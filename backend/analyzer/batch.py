@@ -0,0 +1,183 @@
+"""
+Batch evaluation of many logs in one request.
+
+Cached results are answered inline. The remaining logs (one per distinct
+content hash, even a single one, so every analysis runs under the batch
+deadline) are fanned out over a bounded, spawn-based process pool
+that stays warm between requests, so a campaign overview costs one HTTP
+request instead of N.
+
+A log still running at the batch deadline cannot be cancelled: its pool
+is discarded and the pool's processes are terminated, so abandoned work
+does not hold slots the next batches need.
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from .cache import HIT, MISS, content_hash
+from .evaluation import cached_evaluation, evaluate_log, remember_evaluation
+from .models import UploadedLog
+from .workers import init_worker_process
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class _TrackingContext:
+    """
+    The spawn context, remembering the processes it starts. The executor
+    has no public way to stop running tasks (before 3.14), but it starts
+    its workers through its ``mp_context``.
+    """
+
+    def __init__(self):
+        self._context = multiprocessing.get_context('spawn')
+        self.processes = []
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+    def Process(self, *args, **kwargs):
+        process = self._context.Process(*args, **kwargs)
+        self.processes.append(process)
+        return process
+
+
+class _BatchPool(ProcessPoolExecutor):
+    def __init__(self, max_workers):
+        self.tracking_context = _TrackingContext()
+        super().__init__(
+            max_workers=max_workers,
+            mp_context=self.tracking_context,
+            initializer=init_worker_process,
+        )
+
+    def terminate_workers(self):
+        """Kill the pool's processes, with whatever they are running"""
+        for process in self.tracking_context.processes:
+            if process.is_alive():
+                process.terminate()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _BatchPool(max_workers=max(settings.BATCH_EVALUATION_PROCESSES, 1))
+        return _pool
+
+
+def _discard_pool(pool, terminate=False):
+    """
+    Forget a broken or stuck pool so the next batch starts a fresh one.
+    With `terminate`, analyses still running in it are killed.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+    if terminate:
+        pool.terminate_workers()
+
+
+def evaluate_log_id(log_id, params):
+    """Pool task: evaluate one log by id"""
+    payload, _ = evaluate_log(UploadedLog.objects.get(pk=log_id), params)
+    return payload
+
+
+def _summary(uploaded_log, payload, cache_state):
+    return {
+        'file_id': uploaded_log.id,
+        'filename': uploaded_log.original_name or uploaded_log.file.name,
+        'status': 'ok',
+        'cache': cache_state,
+        **payload,
+    }
+
+
+def evaluate_many(logs, params, timeout=None):
+    """
+    Evaluate `logs` (already ownership-checked) with the same params.
+    Returns (results, failed): one summary per evaluated log, and one
+    {file_id, error} entry per log that could not be evaluated.
+    """
+    timeout = timeout or settings.BATCH_EVALUATION_TIMEOUT
+    results = {}
+    failed = {}
+    pending = {}  # content hash -> logs sharing that content
+
+    for uploaded_log in logs:
+        try:
+            payload = cached_evaluation(uploaded_log, params)
+            if payload is not None:
+                results[uploaded_log.id] = _summary(uploaded_log, payload, HIT)
+            else:
+                pending.setdefault(content_hash(uploaded_log), []).append(uploaded_log)
+        except Exception as e:
+            failed[uploaded_log.id] = str(e)
+
+    def finish(group, payload=None, error=None):
+        if error is not None:
+            for uploaded_log in group:
+                failed[uploaded_log.id] = error
+            return
+        remember_evaluation(group[0], params, payload)
+        for position, uploaded_log in enumerate(group):
+            results[uploaded_log.id] = _summary(uploaded_log, payload, MISS if position == 0 else HIT)
+
+    groups = list(pending.values())
+    if groups:
+        # A single miss goes through the pool too: only there can it be
+        # stopped at the deadline
+        _fan_out(groups, params, timeout, finish)
+
+    return results, failed
+
+
+def _fan_out(groups, params, timeout, finish):
+    pool = _get_pool()
+    deadline = time.monotonic() + timeout
+    try:
+        futures = {
+            pool.submit(evaluate_log_id, group[0].id, params): group
+            for group in groups
+        }
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        for group in groups:
+            finish(group, error='Analysis pool unavailable')
+        return
+
+    remaining = set(futures)
+    while remaining:
+        done, remaining = wait(
+            remaining, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED
+        )
+        if not done:
+            break
+        for future in done:
+            try:
+                finish(futures[future], future.result())
+            except BrokenProcessPool:
+                _discard_pool(pool)
+                finish(futures[future], error='Analysis process crashed')
+            except Exception as e:
+                finish(futures[future], error=str(e))
+
+    running = False
+    for future in remaining:
+        # cancel() only stops analyses that have not started yet
+        running |= not future.cancel()
+        finish(futures[future], error=f'Timed out after {timeout} seconds')
+    if running:
+        _discard_pool(pool, terminate=True)
@@ -0,0 +1,171 @@
+"""
+Content-addressed, deduplicated storage for uploaded logs.
+
+Files are stored once under ``blobs/<aa>/<sha256><ext>``. Uploading the
+same bytes again only adds a reference, so duplicates cost no disk and,
+because sidecars and cached analyses are keyed on the stored file and its
+hash, no extra analysis either. A blob is removed with its sidecar when
+the last UploadedLog referencing it is deleted.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import transaction
+from django.db.models import F
+
+from .compression import storage_extension
+from .models import LogBlob, UploadedLog
+from .storage import SIDECAR_SUFFIX
+from .summaries import copy_twin_summaries
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Computes the SHA-256 of each uploaded file while Django receives it.
+    Data is passed through untouched to the next handler.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.digests = {}
+        self._digest = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._digest.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self._digest.hexdigest()
+        return None
+
+
+def blob_name(sha256, extension):
+    return f'blobs/{sha256[:2]}/{sha256}{extension}'
+
+
+def blob_staging_dir():
+    directory = default_storage.path('blobs/tmp')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def blob_staging_file():
+    """Open a temporary file on the blob volume (so it can be renamed in)"""
+    fd, path = tempfile.mkstemp(dir=blob_staging_dir(), suffix='.part')
+    return os.fdopen(fd, 'wb'), path
+
+
+def _upload_sha256(content):
+    digest = hashlib.sha256()
+    for block in content.chunks():
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def store_log(user, original_name, sha256=None, content=None, path=None):
+    """
+    Create an UploadedLog for a file given either as an uploaded ``content``
+    object or as a staged file ``path`` (moved into place, or discarded when
+    the content is already stored). Returns (uploaded_log, deduplicated).
+    """
+    extension = storage_extension(original_name)
+    if sha256 is None:
+        sha256 = _upload_sha256(content)
+    name = blob_name(sha256, extension)
+
+    with transaction.atomic():
+        blob, created = LogBlob.objects.select_for_update().get_or_create(
+            sha256=sha256,
+            extension=extension,
+            defaults={'file': name},
+        )
+        target = default_storage.path(blob.file.name)
+        deduplicated = not created and os.path.exists(target)
+
+        known = {}
+        if deduplicated:
+            if path is not None:
+                os.remove(path)
+            size = blob.size
+            # Same content, same rows and analysis outcome
+            known = UploadedLog.objects.filter(blob=blob).values('row_count', 'analysis_state').first() or {}
+        else:
+            size = _write_blob(target, content=content, path=path)
+            LogBlob.objects.filter(pk=blob.pk).update(size=size)
+
+        LogBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+        uploaded_log = UploadedLog.objects.create(
+            user=user,
+            file=blob.file.name,
+            original_name=os.path.basename(original_name),
+            sha256=sha256,
+            blob=blob,
+            size=size,
+            **known,
+        )
+        if deduplicated:
+            copy_twin_summaries(uploaded_log)
+    return uploaded_log, deduplicated
+
+
+def record_log_metadata(uploaded_log, **fields):
+    """
+    Store row_count/analysis_state learnt from a log's content on every
+    log sharing its blob. Skips the write when nothing changed.
+    """
+    changed = {
+        name: value for name, value in fields.items() if getattr(uploaded_log, name) != value
+    }
+    if not changed:
+        return
+    for name, value in changed.items():
+        setattr(uploaded_log, name, value)
+    # Performance: A queryset update (no pre_save signal, no file access)
+    if uploaded_log.blob_id:
+        UploadedLog.objects.filter(blob_id=uploaded_log.blob_id).update(**changed)
+    else:
+        UploadedLog.objects.filter(pk=uploaded_log.pk).update(**changed)
+
+
+def _write_blob(target, content=None, path=None):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if path is None:
+        out, path = blob_staging_file()
+        try:
+            with out:
+                for block in content.chunks():
+                    out.write(block)
+        except BaseException:
+            os.remove(path)
+            raise
+    size = os.path.getsize(path)
+    os.replace(path, target)
+    return size
+
+
+def release_blob(uploaded_log):
+    """Drop one reference; delete the file and its sidecar with the last one"""
+    with transaction.atomic():
+        LogBlob.objects.filter(pk=uploaded_log.blob_id).update(ref_count=F('ref_count') - 1)
+        orphan = LogBlob.objects.select_for_update().filter(
+            pk=uploaded_log.blob_id, ref_count__lte=0
+        ).first()
+        if orphan is None:
+            return False
+        name = orphan.file.name
+        orphan.delete()
+        transaction.on_commit(lambda: _delete_blob_files(name))
+    return True
+
+
+def _delete_blob_files(name):
+    default_storage.delete(name)
+    shutil.rmtree(default_storage.path(name) + SIDECAR_SUFFIX, ignore_errors=True)
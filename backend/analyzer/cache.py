@@ -0,0 +1,201 @@
+"""
+Content-addressed cache for finished analysis payloads.
+
+Keys combine the SHA-256 of the uploaded file, the analysis parameters and
+``ENGINE_VERSION``, so identical content is analysed once and engine changes
+never serve stale numbers. Each digest also has a generation counter in
+the key: invalidating a log bumps it with an atomic ``incr``, which retires
+every cached result for that content, whichever twin computed it. Payloads above a per-item cap are skipped; the
+byte budget is left to the cache backend, which evicts least recently used
+entries atomically (BoundedLocMemCache locally, Redis' maxmemory policy in
+production).
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+from .analysis import ENGINE_VERSION
+from .storage import file_sha256
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'analysis'
+HIT = 'HIT'
+MISS = 'MISS'
+
+
+# Stored bytes per LocMemCache name, shared like LocMemCache's own stores
+_stored_bytes = {}
+
+
+class BoundedLocMemCache(LocMemCache):
+    """
+    LocMemCache that also evicts the least recently used entries once the
+    stored values exceed OPTIONS['MAX_BYTES']. A running byte total is kept
+    under the backend's own lock, so concurrent writers never lose an
+    update and a write costs no walk over the other entries.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._max_bytes = params.get('OPTIONS', {}).get('MAX_BYTES')
+        self._bytes = _stored_bytes.setdefault(name, [0])
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._bytes[0] -= len(previous)
+        super()._set(key, value, timeout)
+        self._bytes[0] += len(value)
+        if self._max_bytes is None:
+            return
+        # The most recently used entry is first, the new one is never evicted
+        while self._bytes[0] > self._max_bytes and len(self._cache) > 1:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        key, pickled = self._cache.popitem()
+        del self._expire_info[key]
+        self._bytes[0] -= len(pickled)
+
+    def _cull(self):
+        if self._cull_frequency == 0:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._bytes[0] = 0
+            return
+        for _ in range(len(self._cache) // self._cull_frequency):
+            self._evict_oldest()
+
+    def _delete(self, key):
+        pickled = self._cache.get(key)
+        if not super()._delete(key):
+            return False
+        self._bytes[0] -= len(pickled)
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        # Goes through _set, the new value's size may differ
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            if self._has_expired(key):
+                self._delete(key)
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(self._cache[key]) + delta
+            expiry = self._expire_info[key]
+            self._set(key, pickle.dumps(value, self.pickle_protocol))
+            self._expire_info[key] = expiry
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._bytes[0] = 0
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _generation_key(digest):
+    return f'analysis:gen:{digest}'
+
+
+def _memo_key(path):
+    stat = os.stat(path)
+    return 'sha256:' + hashlib.sha1(
+        f'{path}:{stat.st_size}:{stat.st_mtime_ns}'.encode()
+    ).hexdigest()
+
+
+def content_hash(uploaded_log):
+    """SHA-256 of an upload, memoised per (path, size, mtime)"""
+    if uploaded_log.sha256:
+        # Content-addressed uploads were hashed while being received
+        return uploaded_log.sha256
+
+    path = uploaded_log.file.path
+    memo_key = _memo_key(path)
+    digest = _cache().get(memo_key)
+    if digest is None:
+        digest = file_sha256(path)
+        _cache().set(memo_key, digest, timeout=None)
+    return digest
+
+
+def known_content_hash(uploaded_log):
+    """The digest content_hash would return, or None if it was never computed"""
+    if uploaded_log.sha256:
+        return uploaded_log.sha256
+    try:
+        return _cache().get(_memo_key(uploaded_log.file.path))
+    except Exception:
+        return None
+
+
+def analysis_cache_key(digest, params):
+    encoded = json.dumps(params or {}, sort_keys=True, default=str)
+    params_hash = hashlib.sha1(encoded.encode()).hexdigest()[:16]
+    try:
+        generation = _cache().get(_generation_key(digest), 0)
+    except Exception:
+        generation = 0
+    return f'analysis:v{ENGINE_VERSION}:{digest}:{generation}:{params_hash}'
+
+
+def get_cached_analysis(key):
+    """Return the cached payload or None"""
+    try:
+        blob = _cache().get(key)
+        if blob is None:
+            return None
+        return pickle.loads(blob)
+    except Exception as e:
+        logger.warning(f"Analysis cache read failed for {key}: {e}")
+        return None
+
+
+def is_cached(key):
+    try:
+        return _cache().has_key(key)
+    except Exception:
+        return False
+
+
+def store_analysis(log_id, key, payload):
+    """Cache a payload unless it exceeds the per-item size cap"""
+    try:
+        blob = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > settings.ANALYSIS_CACHE_MAX_ITEM_BYTES:
+            logger.info(f"Skipping analysis cache for log {log_id}: {len(blob)} bytes")
+            return False
+
+        _cache().set(key, blob)
+        return True
+    except Exception as e:
+        logger.warning(f"Analysis cache write failed for log {log_id}: {e}")
+        return False
+
+
+def invalidate_log(uploaded_log):
+    """
+    Retire every cached analysis of a log's content. The old entries are
+    no longer addressed and age out of the backend.
+    """
+    digest = known_content_hash(uploaded_log)
+    if digest is None:
+        return  # Never hashed, so nothing was cached for it
+    cache = _cache()
+    try:
+        cache.add(_generation_key(digest), 0, timeout=None)
+        cache.incr(_generation_key(digest))
+    except Exception as e:
+        logger.warning(f"Analysis cache invalidation failed for log {uploaded_log.pk}: {e}")
@@ -0,0 +1,133 @@
+"""
+Periodicity comparison of several logs, e.g. two flight software builds.
+
+Every log is reduced to an interval profile: per (message_type,
+rt_address) group the interval count, mean, std and a histogram on the
+fixed streaming edges. Profiles are cached per content, aligned on their
+group keys, and all deltas and distances are computed on
+(log x group [x bin]) matrices against the first log, the baseline.
+"""
+import numpy as np
+import pandas as pd
+
+from .analysis import group_codes, grouped_intervals, timestamps_from_frame
+from .cache import analysis_cache_key, content_hash, get_cached_analysis, store_analysis
+from .evaluation import InvalidLogError, load_compact_frame
+from .streaming import HISTOGRAM_EDGES
+
+# Keys groups are aligned on when none are requested; the ones missing
+# from any of the logs are dropped
+DEFAULT_COMPARE_KEYS = ['message_type', 'rt_address']
+
+_BINS = len(HISTOGRAM_EDGES) + 1
+_WIDTHS = np.diff(HISTOGRAM_EDGES)
+
+
+def interval_profile(uploaded_log, keys):
+    """
+    Interval statistics and histogram of every group of one log, for the
+    `keys` present in it. Groups with unparsable timestamps are left out.
+    """
+    cache_key = analysis_cache_key(content_hash(uploaded_log), {'profile': keys})
+    profile = get_cached_analysis(cache_key)
+    if profile is not None:
+        return profile
+
+    df, _ = load_compact_frame(uploaded_log, {'group_by': keys})
+    if df is None:
+        raise InvalidLogError("Invalid log file format or missing required columns.")
+    present = [name for name in keys if name in df.columns]
+    if not present:
+        raise InvalidLogError(f"Log has none of the columns: {', '.join(keys)}")
+
+    _, parsed = timestamps_from_frame(df)
+    codes, key_values = group_codes(df, present)
+    usable = (codes >= 0) & parsed.valid & ~parsed.missing
+    n_groups = len(key_values)
+    grouped = grouped_intervals(codes[usable], parsed.ns[usable], n_groups)
+
+    # Performance: Every group's histogram from one searchsorted + bincount
+    owner = np.repeat(np.arange(n_groups), np.diff(grouped.interval_bounds))
+    bins = np.searchsorted(HISTOGRAM_EDGES, grouped.intervals, side='right')
+    histogram = np.bincount(owner * _BINS + bins, minlength=n_groups * _BINS).reshape(n_groups, _BINS)
+
+    profile = {
+        'keys': present,
+        'groups': [tuple(str(value) for value in values) for values in key_values],
+        'count': grouped.count,
+        'mean': grouped.mean,
+        'std': grouped.std,
+        'histogram': histogram,
+    }
+    store_analysis(uploaded_log.id, cache_key, profile)
+    return profile
+
+
+def compare_logs(logs, group_by=None):
+    """
+    Align the groups of `logs` and compare each one with logs[0].
+    Every metric is a (log x group) matrix; groups absent from a log have a
+    zero count and null statistics.
+    """
+    keys = list(group_by or DEFAULT_COMPARE_KEYS)
+    profiles = [interval_profile(uploaded_log, keys) for uploaded_log in logs]
+
+    common = [name for name in keys if all(name in profile['keys'] for profile in profiles)]
+    if group_by and common != keys:
+        missing = sorted(set(keys) - set(common))
+        raise InvalidLogError(f"Not every log has the group_by columns: {', '.join(missing)}")
+    if not common:
+        raise InvalidLogError(f"The logs share none of the columns: {', '.join(keys)}")
+    # Default keys one of the logs lacks: regroup the others on the shared ones
+    profiles = [
+        profile if profile['keys'] == common else interval_profile(uploaded_log, common)
+        for uploaded_log, profile in zip(logs, profiles)
+    ]
+
+    groups = pd.Index(sorted(set().union(*(profile['groups'] for profile in profiles))), tupleize_cols=False)
+    shape = (len(logs), len(groups))
+    count = np.zeros(shape, dtype=np.int64)
+    mean = np.full(shape, np.nan)
+    std = np.full(shape, np.nan)
+    histogram = np.zeros(shape + (_BINS,), dtype=np.int64)
+    for row, profile in enumerate(profiles):
+        if not profile['groups']:
+            continue
+        columns = groups.get_indexer(pd.Index(profile['groups'], tupleize_cols=False))
+        count[row, columns] = profile['count']
+        filled = profile['count'] > 0
+        mean[row, columns[filled]] = profile['mean'][filled]
+        std[row, columns[filled]] = profile['std'][filled]
+        histogram[row, columns] = profile['histogram']
+
+    wasserstein, ks = histogram_distances(histogram, count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        relative = (mean - mean[0]) / mean[0]
+
+    return {
+        'group_by': common,
+        'groups': [dict(zip(common, values)) for values in groups],
+        'count': count.tolist(),
+        'average_periodicity': mean.tolist(),
+        'jitter_std_dev': std.tolist(),
+        'delta_average_periodicity': (mean - mean[0]).tolist(),
+        'relative_delta_average_periodicity': relative.tolist(),
+        'delta_jitter_std_dev': (std - std[0]).tolist(),
+        'wasserstein': wasserstein.tolist(),
+        'ks': ks.tolist(),
+    }
+
+
+def histogram_distances(histogram, count):
+    """
+    1-Wasserstein distance (seconds) and Kolmogorov-Smirnov statistic of
+    every (log, group) interval distribution against log 0, measured on
+    the fixed histogram edges. Values beyond the outer edges are clamped
+    to them.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cdf = np.cumsum(histogram, axis=2)[:, :, :len(HISTOGRAM_EDGES)] / count[:, :, None]
+    gap = np.abs(cdf - cdf[0])
+    wasserstein = gap[:, :, :-1] @ _WIDTHS
+    ks = gap.max(axis=2)
+    return wasserstein, ks
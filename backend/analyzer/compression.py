@@ -0,0 +1,113 @@
+"""
+Compressed log wrappers (.gz, .zip, .zst).
+
+Compressed uploads are stored as received. Readers get a binary stream
+that inflates on the fly, so parsers consume the content chunk by chunk
+and no decompressed copy of the file is ever written.
+"""
+import gzip
+import os
+import zipfile
+from contextlib import contextmanager
+
+WRAPPERS = ('.gz', '.zip', '.zst')
+
+# Formats that may be wrapped (.xlsx is already a zip archive)
+COMPRESSIBLE_EXTENSIONS = ('.csv', '.txt', '.json', '.mil')
+
+
+class UnsupportedArchive(ValueError):
+    """Raised for archives that do not hold exactly one readable log"""
+
+
+def split_wrapper(name):
+    """'run.csv.gz' -> ('.csv', '.gz'); 'run.csv' -> ('.csv', None)"""
+    root, ext = os.path.splitext(str(name).lower())
+    if ext in WRAPPERS:
+        return os.path.splitext(root)[1], ext
+    return ext, None
+
+
+def storage_extension(name):
+    """Extension kept on stored files, e.g. '.csv.gz'"""
+    inner, wrapper = split_wrapper(name)
+    return inner + wrapper if wrapper else inner
+
+
+def _zip_member(archive):
+    members = [info for info in archive.infolist() if not info.is_dir()]
+    if len(members) != 1:
+        raise UnsupportedArchive("Zip archives must contain exactly one log file")
+    return members[0]
+
+
+def log_format(source, name=None):
+    """
+    (inner extension, wrapper) of a log given as a path or an open file.
+    Zip archives are identified by their single member's name.
+    """
+    inner, wrapper = split_wrapper(name or source)
+    if wrapper == '.zip':
+        try:
+            with zipfile.ZipFile(source) as archive:
+                inner = os.path.splitext(_zip_member(archive).filename)[1].lower()
+        except zipfile.BadZipFile as e:
+            raise UnsupportedArchive(str(e))
+        finally:
+            if hasattr(source, 'seek'):
+                source.seek(0)
+    return inner, wrapper
+
+
+@contextmanager
+def open_log(path):
+    """Binary stream of a log's content, decompressed on the fly"""
+    wrapper = split_wrapper(path)[1]
+    archive = None
+
+    if wrapper is None:
+        stream = open(path, 'rb')
+    elif wrapper == '.gz':
+        stream = gzip.open(path, 'rb')
+    elif wrapper == '.zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise UnsupportedArchive("Reading .zst logs requires the 'zstandard' package")
+        stream = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    else:
+        try:
+            archive = zipfile.ZipFile(path)
+            stream = archive.open(_zip_member(archive))
+        except zipfile.BadZipFile as e:
+            raise UnsupportedArchive(str(e))
+
+    try:
+        yield stream
+    finally:
+        stream.close()
+        if archive is not None:
+            archive.close()
+
+
+def check_log_format(name, allowed, source=None):
+    """
+    (inner extension, wrapper) of an upload, raising UnsupportedArchive if
+    its format is not in `allowed`. Zip members are only checked when the
+    archive itself (`source`) is available.
+    """
+    try:
+        inner, wrapper = log_format(source, name) if source is not None else split_wrapper(name)
+    except OSError as e:
+        raise UnsupportedArchive(str(e))
+    if wrapper is None:
+        if inner not in allowed:
+            raise UnsupportedArchive(f'Unsupported file type. Allowed: {", ".join(allowed)}')
+        return inner, wrapper
+
+    compressible = [ext for ext in allowed if ext in COMPRESSIBLE_EXTENSIONS]
+    if inner in compressible or (wrapper == '.zip' and source is None and not inner):
+        return inner, wrapper
+    raise UnsupportedArchive(
+        f'Unsupported compressed file. {wrapper} archives may contain: {", ".join(compressible)}'
+    )
@@ -0,0 +1,586 @@
+"""
+Evaluation pipeline shared by the request path and background workers
+"""
+import base64
+import io
+import logging
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from django.conf import settings
+
+from .analysis import (
+    TIMESTAMP_COLUMNS, group_codes, group_seconds, grouped_intervals, grouped_percentiles, histogram_bins,
+    interval_series, detect_gaps, rolling_jitter, timestamps_from_frame,
+)
+from .blobs import record_log_metadata
+from .cache import (
+    HIT, MISS, analysis_cache_key, content_hash, get_cached_analysis, is_cached, store_analysis,
+)
+from .compression import UnsupportedArchive, log_format, open_log
+from .models import UploadedLog
+from .parsers import ALL_SHEETS, parse_mil, read_xlsx, xlsx_columns
+from .selection import FILTER_COLUMNS, build_timestamp_index, filter_mask, timestamp_index, window_rows
+from .sketches import REPORTED_QUANTILES
+from .storage import read_manifest, read_sidecar, write_sidecar
+from .streaming import CSV_CHUNK_ROWS, GapDetector, analyze_csv_stream
+from .summaries import summarize_log
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidLogError(Exception):
+    """Raised when an upload cannot be turned into an analysable frame"""
+
+
+def parse_excel(file, usecols=None, max_rows=None, sheets=None):
+    try:
+        # Performance: Streamed in read-only mode, only `usecols` are kept
+        return read_xlsx(file, usecols=usecols, max_rows=max_rows, sheets=sheets)
+    except Exception as e:
+        print(f"[Error parsing Excel file]: {e}")
+        return None
+
+
+def parse_csv(file):
+    try:
+        return pd.read_csv(file)
+    except Exception as e:
+        print(f"[Error parsing CSV file]: {e}")
+        return None
+
+
+FRAME_PARSERS = {
+    '.xlsx': parse_excel,
+    '.csv': parse_csv,
+    '.mil': parse_mil,
+}
+
+
+def load_log_frame(uploaded_log):
+    """Read the columnar sidecar, converting the upload on first use"""
+    df = read_sidecar(uploaded_log)
+    if df is not None:
+        return df
+
+    path = uploaded_log.file.path
+    try:
+        ext, wrapper = log_format(path)
+        parser = FRAME_PARSERS.get(ext, parse_excel)
+        if wrapper is None:
+            df = parser(path)
+        else:
+            # Performance: Parsed straight from the decompressing stream
+            with open_log(path) as stream:
+                df = parser(stream)
+    except UnsupportedArchive as e:
+        logger.warning(f"Cannot open compressed log {uploaded_log.id}: {e}")
+        return None
+    if df is not None:
+        try:
+            write_sidecar(uploaded_log, df)
+        except Exception:
+            logger.exception(f"Columnar cache write failed for log {uploaded_log.id}")
+    return df
+
+
+def open_log_rows(uploaded_log):
+    """
+    (column names, row count, read) for paging through a log, where
+    read(columns, rows, categorical=()) loads only those columns and rows
+    from the sidecar. The log is converted on first use; None if it
+    cannot be read.
+    """
+    manifest = read_manifest(uploaded_log)
+    if manifest is None or 'all_columns' in manifest:
+        df = load_log_frame(uploaded_log)
+        if df is None:
+            return None
+        # This request holds the parsed frame already, later ones read the sidecar
+        def read(columns, rows, categorical=()):
+            return (df if rows is None else df.iloc[rows])[columns]
+        return list(df.columns), len(df), read
+
+    def read(columns, rows, categorical=()):
+        df = read_sidecar(uploaded_log, columns=columns, categorical=categorical, rows=rows)
+        if df is None:
+            raise InvalidLogError("Unable to read file rows")
+        return df[columns]
+
+    return [entry['name'] for entry in manifest['columns']], manifest['rows'], read
+
+
+def frame_shape(uploaded_log):
+    """Column names and row count from the sidecar, without loading data"""
+    manifest = read_manifest(uploaded_log)
+    if manifest is None:
+        return None
+    names = manifest.get('all_columns') or [entry['name'] for entry in manifest['columns']]
+    return names, manifest['rows']
+
+
+def analysis_columns(columns, params):
+    """The columns an analysis reads: the timestamp column, the group keys and filters"""
+    keys = set(params.get('group_by', DEFAULT_GROUP_BY))
+    keys.update(name for name in FILTER_COLUMNS if params.get(name))
+    timestamp_col = next((name for name in TIMESTAMP_COLUMNS if name in columns), None)
+    return [name for name in columns if name == timestamp_col or name in keys]
+
+
+def load_compact_frame(uploaded_log, params):
+    """
+    Load only what the analysis reads: the timestamp and group-key
+    columns, string keys as categoricals, numeric keys downcast and NaN
+    filled per column (no full-frame fillna copy). Logs larger than
+    COMPACT_PARSE_MIN_BYTES are never parsed whole; their analysis columns
+    are read in chunks and kept as a partial sidecar.
+    Only the rows selected by start/end/message_type/rt_address are kept;
+    a time window is read through the log's timestamp index.
+    Workbooks are read from their first sheet; grouped by ``sheet``, every
+    sheet with the same header is read (and not cached in the sidecar).
+    Returns (df, shape) where shape describes the whole log.
+    """
+    keys = set(params.get('group_by', DEFAULT_GROUP_BY))
+    keys.update(name for name in FILTER_COLUMNS if params.get(name))
+    windowed = 'start' in params or 'end' in params
+    all_sheets = 'sheet' in keys and log_format(uploaded_log.file.path)[0] == '.xlsx'
+    shape = None if all_sheets else frame_shape(uploaded_log)
+    df = None
+    if shape is not None:
+        columns = analysis_columns(shape[0], params)
+        rows = None
+        timestamp_col = next((name for name in TIMESTAMP_COLUMNS if name in columns), None)
+        if windowed and timestamp_col is not None:
+            # Performance: Binary search in the persisted index, then read
+            # only the window's rows from the sidecar
+            rows = window_rows(
+                timestamp_index(uploaded_log, timestamp_col), params.get('start'), params.get('end')
+            )
+        df = read_sidecar(uploaded_log, columns=columns, categorical=keys, rows=rows)
+
+    if df is None:
+        path = uploaded_log.file.path
+        if all_sheets:
+            # The sidecar holds the first sheet only
+            df, names = read_analysis_columns(path, params, sheets=ALL_SHEETS)
+            if df is None:
+                return None, None
+            shape = (names, len(df))
+        elif os.path.getsize(path) >= settings.COMPACT_PARSE_MIN_BYTES:
+            df, names = read_analysis_columns(path, params)
+            if df is None:
+                return None, None
+            shape = (names, len(df))
+            try:
+                write_sidecar(uploaded_log, df, all_columns=names)
+            except Exception:
+                logger.exception(f"Partial columnar cache write failed for log {uploaded_log.id}")
+        else:
+            df = load_log_frame(uploaded_log)
+            if df is None:
+                return None, None
+            shape = (list(df.columns), len(df))
+            df = df[analysis_columns(shape[0], params)]
+
+        timestamp_col = next((name for name in TIMESTAMP_COLUMNS if name in df.columns), None)
+        if windowed and timestamp_col is not None:
+            if all_sheets:
+                index = build_timestamp_index(df[timestamp_col])
+            else:
+                index = timestamp_index(uploaded_log, timestamp_col, frame=df)
+            df = df.iloc[window_rows(index, params.get('start'), params.get('end'))]
+
+    df = pd.DataFrame({
+        name: _fill_column(df[name]) for name in df.columns
+    }, copy=False)
+
+    masks = []
+    for name in FILTER_COLUMNS:
+        if params.get(name):
+            if name not in df.columns:
+                raise InvalidLogError(f"Log has no '{name}' column to filter on")
+            masks.append(filter_mask(df[name], params[name]))
+    if masks:
+        df = df[np.logical_and.reduce(masks)]
+    # Performance: No deep memory_usage here, it walks every timestamp string
+    logger.info(
+        "Compact frame for log %s: %d of %d columns, %d rows",
+        uploaded_log.id, len(df.columns), len(shape[0]), len(df),
+    )
+    return df, shape
+
+
+def read_analysis_columns(path, params, sheets=None):
+    """
+    Parse only the analysis columns of a log. Returns (df, all column names).
+    ``sheets`` is passed to read_xlsx for workbooks.
+    """
+    ext, wrapper = log_format(path)
+    keys = set(params.get('group_by', DEFAULT_GROUP_BY))
+    if ext == '.xlsx':
+        names = xlsx_columns(path, sheets=sheets)
+        df = parse_excel(path, usecols=analysis_columns(names, params), sheets=sheets)
+        if df is None:
+            return None, None
+        return compact_columns(df, keys), names
+    if ext != '.csv':
+        parser = FRAME_PARSERS.get(ext, parse_excel)
+        if wrapper is None:
+            df = parser(path)
+        else:
+            with open_log(path) as stream:
+                df = parser(stream)
+        if df is None:
+            return None, None
+        names = list(df.columns)
+        return compact_columns(df[analysis_columns(names, params)], keys), names
+
+    with open_log(path) as stream:
+        names = list(pd.read_csv(stream, nrows=0).columns)
+    wanted = analysis_columns(names, params)
+    pieces = []
+    with open_log(path) as stream:
+        # Performance: Each chunk's keys become categoricals before the next
+        # chunk is read, so only one chunk of Python strings is alive at a time
+        for chunk in pd.read_csv(stream, usecols=wanted, chunksize=CSV_CHUNK_ROWS):
+            pieces.append(compact_columns(chunk, keys, downcast=False))
+    if not pieces:
+        return pd.DataFrame(columns=wanted), names
+
+    df = pd.DataFrame({
+        name: _concat_column([piece[name] for piece in pieces]) for name in wanted
+    }, copy=False)
+    return compact_columns(df, keys), names
+
+
+def compact_columns(df, keys, downcast=True):
+    """String group keys as categoricals, integer group keys downcast"""
+    data = {}
+    for name in df.columns:
+        series = df[name]
+        if name in keys:
+            if series.dtype == object:
+                series = series.astype('category')
+            elif downcast and series.dtype.kind in 'iu':
+                series = pd.to_numeric(series, downcast='integer' if series.dtype.kind == 'i' else 'unsigned')
+        data[name] = series
+    return pd.DataFrame(data, index=df.index, copy=False)
+
+
+def _concat_column(pieces):
+    if all(isinstance(piece.dtype, pd.CategoricalDtype) or piece.isna().all() for piece in pieces):
+        return pd.api.types.union_categoricals([
+            piece.values if isinstance(piece.dtype, pd.CategoricalDtype)
+            else pd.Categorical(piece, categories=pd.Index([], dtype=object))
+            for piece in pieces
+        ], sort_categories=True)
+    return pd.concat(pieces, ignore_index=True)
+
+
+def _fill_column(series):
+    """fill_missing for one column, copying it only when it has gaps"""
+    if not series.hasnans:
+        return series
+    if isinstance(series.dtype, pd.CategoricalDtype) and 0 not in series.cat.categories:
+        # Numbers sort before strings when an object column is factorized
+        series = series.cat.set_categories([0, *series.cat.categories])
+    return series.fillna(0)
+
+
+def cached_evaluation(uploaded_log, params):
+    """Payload of an already cached analysis, or None (never computes)"""
+    cache_key = analysis_cache_key(content_hash(uploaded_log), params)
+    if params.get('engine') == 'chunked':
+        return get_cached_analysis(cache_key)
+
+    analysis = get_cached_analysis(cache_key)
+    shape = frame_shape(uploaded_log) if analysis is not None else None
+    if shape is None:
+        return None
+    return {
+        'analysis': analysis,
+        'rawData': {'columns': shape[0], 'total_rows': shape[1]},
+    }
+
+
+def remember_evaluation(uploaded_log, params, payload):
+    """
+    Cache a payload computed in another process, whose writes may have
+    gone to its own process-local cache.
+    """
+    cache_key = analysis_cache_key(content_hash(uploaded_log), params)
+    if is_cached(cache_key):
+        return
+    store_analysis(
+        uploaded_log.id,
+        cache_key,
+        payload if params.get('engine') == 'chunked' else payload['analysis'],
+    )
+
+
+def evaluate_log(uploaded_log, params, include_rows=False):
+    """
+    Run (or fetch from cache) the analysis of one log.
+    Returns the response payload and the cache state (HIT/MISS).
+    """
+    # Performance: Reuse results for identical content and parameters
+    cache_key = analysis_cache_key(content_hash(uploaded_log), params)
+    if params.get('engine') == 'chunked':
+        return evaluate_chunked(uploaded_log, cache_key, params)
+
+    analysis = get_cached_analysis(cache_key)
+    cache_state = HIT
+
+    shape = None
+    if analysis is not None and not include_rows:
+        shape = frame_shape(uploaded_log)
+
+    if shape is None:
+        if include_rows:
+            df = load_log_frame(uploaded_log)
+            if df is not None:
+                # Replace NaN values in the DataFrame with 0 before processing
+                df = fill_missing(df)
+                shape = (list(df.columns), len(df))
+        else:
+            # Performance: Only the analysis columns, in their compact form
+            df, shape = load_compact_frame(uploaded_log, params)
+        if df is None:
+            record_log_metadata(uploaded_log, analysis_state=UploadedLog.STATE_FAILED)
+            raise InvalidLogError("Invalid log file format or missing required columns.")
+
+        if analysis is None:
+            analysis = analyze_frame(df, params)
+            store_analysis(uploaded_log.id, cache_key, analysis)
+            cache_state = MISS
+            try:
+                # First evaluation of the log: persist its per-group summary
+                summarize_log(uploaded_log)
+            except Exception as e:
+                # summarize_log marked the log, `summarize_logs --failed` retries it
+                logger.warning(f"Summary of log {uploaded_log.id} failed: {e}")
+    record_log_metadata(uploaded_log, row_count=shape[1], analysis_state=UploadedLog.STATE_ANALYSED)
+
+    # Performance: Rows are served by /api/files/<id>/rows/ unless requested
+    raw_data = {
+        'columns': shape[0],
+        'total_rows': shape[1],
+    }
+    if include_rows:
+        raw_data['rows'] = df.to_dict(orient='records')
+
+    # NaN/inf left in the payload are encoded as null by FastJSONRenderer
+    payload = {
+        'analysis': analysis,
+        'rawData': raw_data,
+    }
+    return payload, cache_state
+
+
+def evaluate_chunked(uploaded_log, cache_key, params=None):
+    """
+    Constant-memory evaluation of a CSV log (statistics and gaps, no plots).
+    The whole payload is cached since no sidecar describes the file.
+    """
+    payload = get_cached_analysis(cache_key)
+    if payload is not None:
+        return payload, HIT
+
+    path = uploaded_log.file.path
+    if log_format(path)[0] != '.csv':
+        raise InvalidLogError("The chunked engine only supports CSV logs.")
+
+    gaps = (params or {}).get('gaps')
+    detector = GapDetector(gaps['multiple'], gaps.get('periods')) if gaps else None
+    analysis, columns, stats = analyze_csv_stream(path, gaps=detector)
+    record_log_metadata(uploaded_log, row_count=stats['rows'], analysis_state=UploadedLog.STATE_ANALYSED)
+    payload = {
+        'analysis': analysis,
+        'rawData': {'columns': columns, 'total_rows': stats['rows']},
+        'metadata': stats,
+    }
+    store_analysis(uploaded_log.id, cache_key, payload)
+    return payload, MISS
+
+
+def fill_missing(df):
+    """fillna(0) that leaves categorical columns (no 0 category) untouched"""
+    values = {
+        name: 0 for name in df.columns
+        if not isinstance(df[name].dtype, pd.CategoricalDtype)
+    }
+    return df.fillna(values)
+
+
+def safe_float(val):
+    try:
+        f = float(val)
+        if math.isnan(f) or math.isinf(f):
+            return 0
+        return round(f, 6)
+    except Exception:
+        return 0
+
+
+ANALYSIS_ENGINES = ('frame', 'chunked')
+PLOT_MODES = ('png', 'series', 'none')
+DEFAULT_SERIES_POINTS = 1000
+MAX_SERIES_POINTS = 20000
+DEFAULT_GROUP_BY = ['message_type']
+
+
+def analyze_frame(df, params=None):
+    params = params or {}
+    group_by = params.get('group_by', DEFAULT_GROUP_BY)
+    unknown = [name for name in group_by if name not in df.columns]
+    if unknown:
+        raise InvalidLogError(f"Unknown group_by columns: {', '.join(map(str, unknown))}")
+
+    raw_timestamps, parsed = timestamps_from_frame(df)
+
+    # Performance: Number every (key, ...) combination once, then compute all
+    # groups with one sort instead of a Python pass per group
+    codes, key_values = group_codes(df, group_by)
+    keyed = codes >= 0
+    n_groups = len(key_values)
+
+    usable = keyed & parsed.valid & ~parsed.missing
+    grouped = grouped_intervals(codes[usable], parsed.ns[usable], n_groups)
+    # Every interval is in memory, so percentiles are exact (one sort for all groups)
+    percentiles = grouped_percentiles(grouped.intervals, grouped.interval_bounds, [q for q, _ in REPORTED_QUANTILES])
+    # Groups holding unparsable timestamps keep the legacy numeric fallback
+    legacy = set(np.unique(codes[keyed & ~parsed.valid & ~parsed.missing]).tolist())
+
+    result = {}
+    for code, values in enumerate(key_values):
+        label = values[0] if len(group_by) == 1 else ' / '.join(map(str, values))
+
+        if code in legacy:
+            positions = np.flatnonzero(codes == code)
+            seconds = group_seconds(parsed, positions, raw_timestamps[positions])
+            intervals = np.diff(seconds)
+            intervals = intervals[~np.isnan(intervals)]
+            intervals = intervals[intervals != 0]  # Remove zero intervals
+            stats = _interval_stats(intervals) if len(seconds) >= 2 else _interval_stats([])
+        else:
+            seconds = grouped.seconds[grouped.row_bounds[code]:grouped.row_bounds[code + 1]]
+            intervals = grouped.intervals[grouped.interval_bounds[code]:grouped.interval_bounds[code + 1]]
+            stats = {
+                "average_periodicity": safe_float(grouped.mean[code]),
+                "min_periodicity": safe_float(grouped.minimum[code]),
+                "max_periodicity": safe_float(grouped.maximum[code]),
+                "jitter_std_dev": safe_float(grouped.std[code]),
+                **{key: safe_float(value) for (_, key), value in zip(REPORTED_QUANTILES, percentiles[code])},
+            } if grouped.count[code] else _interval_stats([])
+
+        entry = dict(stats)
+        if len(group_by) > 1:
+            entry["group"] = dict(zip(group_by, values))
+        entry.update(render_plots(seconds, intervals if len(seconds) >= 2 else [], label, params))
+        if params.get('gaps'):
+            entry["gaps"] = detect_gaps(
+                seconds, params['gaps']['multiple'], _supplied_period(params['gaps'], group_by, values),
+                None if code in legacy else int(grouped.origin[code]),
+            )
+        if params.get('rolling'):
+            entry["rolling_jitter"] = rolling_jitter(
+                seconds, params['rolling'], params.get('points', DEFAULT_SERIES_POINTS)
+            )
+        result[label] = entry
+
+    return result
+
+
+def _supplied_period(gaps, group_by, values):
+    """Nominal period given for a group's message type, or the default one"""
+    periods = gaps.get('periods') or {}
+    if 'message_type' in group_by:
+        message_type = str(values[group_by.index('message_type')])
+        if message_type in periods:
+            return periods[message_type]
+    return periods.get('*')
+
+
+def _interval_stats(intervals):
+    if len(intervals) == 0:
+        return {
+            "average_periodicity": 0,
+            "min_periodicity": 0,
+            "max_periodicity": 0,
+            "jitter_std_dev": 0,
+            **{key: 0 for _, key in REPORTED_QUANTILES},
+        }
+    percentiles = np.quantile(intervals, [q for q, _ in REPORTED_QUANTILES])
+    return {
+        "average_periodicity": safe_float(np.mean(intervals)),
+        "min_periodicity": safe_float(np.min(intervals)),
+        "max_periodicity": safe_float(np.max(intervals)),
+        "jitter_std_dev": safe_float(np.std(intervals)),
+        **{key: safe_float(value) for (_, key), value in zip(REPORTED_QUANTILES, percentiles)},
+    }
+
+
+def render_plots(seconds, intervals, label, params):
+    """
+    Plot output for one group:
+    - png: base64 matplotlib images (default)
+    - series: downsampled interval series + raw histogram bins, no matplotlib
+    - none: statistics only
+    """
+    mode = params.get('plots', 'png')
+    if mode == 'series':
+        return {
+            "periodicity_plot": None,
+            "jitter_histogram": None,
+            "periodicity_series": interval_series(
+                seconds,
+                params.get('points', DEFAULT_SERIES_POINTS),
+                params.get('downsample', 'lttb')
+            ),
+            "jitter_bins": histogram_bins(intervals),
+        }
+    if mode == 'none':
+        return {"periodicity_plot": None, "jitter_histogram": None}
+    return {
+        "periodicity_plot": plot_timestamps(seconds, label) if len(seconds) >= 2 else None,
+        "jitter_histogram": plot_histogram(intervals, label) if len(seconds) >= 2 else None,
+    }
+
+
+def plot_timestamps(timestamps, label):
+    if len(timestamps) < 2:
+        return None
+
+    plt.figure()
+    intervals = np.diff(timestamps)
+    plt.plot(range(len(intervals)), intervals, marker='o')
+    plt.title(f"Periodicity of {label}")
+    plt.xlabel("Occurrence")
+    plt.ylabel("Timestamp")
+    return encode_plot()
+
+
+def plot_histogram(intervals, label):
+    if len(intervals) < 1:
+        return None
+
+    plt.figure()
+    plt.hist(intervals, bins=min(20, len(intervals)), edgecolor='black')
+    plt.title(f"Jitter Histogram: {label}")
+    plt.xlabel("Interval (s)")
+    plt.ylabel("Frequency")
+    return encode_plot()
+
+
+def encode_plot():
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png')
+    buffer.seek(0)
+    encoded = base64.b64encode(buffer.read()).decode('utf-8')
+    plt.close()
+    return f"data:image/png;base64,{encoded}"
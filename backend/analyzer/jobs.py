@@ -0,0 +1,157 @@
+"""
+Database-backed queue for background evaluations and upload assembly.
+
+Jobs are plain ``AnalysisJob`` rows. ``manage.py run_analysis_worker``
+claims queued rows with a conditional UPDATE (safe with several workers on
+SQLite or Postgres, no external broker) and runs them in a local process
+pool.
+"""
+import logging
+
+from django.urls import reverse
+from django.utils import timezone
+
+from .evaluation import cached_evaluation, evaluate_log
+from .models import AnalysisJob, UploadSession
+from .renderers import json_compatible
+from .uploads import assemble_session, upload_result
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_evaluation(uploaded_log, params):
+    """Queue an evaluation; results already in the cache complete instantly"""
+    payload = cached_evaluation(uploaded_log, params)
+    if payload is not None:
+        now = timezone.now()
+        return AnalysisJob.objects.create(
+            user_id=uploaded_log.user_id,
+            log=uploaded_log,
+            params=params,
+            status=AnalysisJob.STATUS_DONE,
+            result=json_compatible(payload),
+            started_at=now,
+            finished_at=now,
+        )
+
+    return AnalysisJob.objects.create(
+        user_id=uploaded_log.user_id,
+        log=uploaded_log,
+        params=params,
+    )
+
+
+def enqueue_assembly(session, allowed_extensions=None):
+    """Queue the assembly of a claimed upload session (see claim_session)"""
+    return AnalysisJob.objects.create(
+        user_id=session.user_id,
+        kind=AnalysisJob.KIND_ASSEMBLE,
+        upload=session,
+        params={'allowed_extensions': allowed_extensions},
+    )
+
+
+def job_payload(job, include_result=False):
+    data = {
+        'job_id': job.id,
+        'kind': job.kind,
+        'file_id': job.log_id,
+        'status': job.status,
+        'status_url': reverse('analysis-job', args=[job.id]),
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.kind == AnalysisJob.KIND_ASSEMBLE:
+        data['upload_id'] = str(job.upload_id) if job.upload_id else None
+    if job.status == AnalysisJob.STATUS_FAILED:
+        data['error'] = job.error
+    if include_result and job.status == AnalysisJob.STATUS_DONE:
+        data['result'] = job.result
+    return data
+
+
+def claim_jobs(limit):
+    """Atomically move up to `limit` of the oldest queued jobs to running"""
+    candidates = list(
+        AnalysisJob.objects.filter(status=AnalysisJob.STATUS_QUEUED)
+        .order_by('created_at')
+        .values_list('id', flat=True)[:limit * 2]
+    )
+
+    claimed = []
+    for job_id in candidates:
+        updated = AnalysisJob.objects.filter(
+            pk=job_id, status=AnalysisJob.STATUS_QUEUED
+        ).update(status=AnalysisJob.STATUS_RUNNING, started_at=timezone.now())
+        if updated:
+            claimed.append(job_id)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def requeue_stale_jobs(max_age):
+    """Return jobs stuck in running (e.g. after a worker crash) to the queue"""
+    cutoff = timezone.now() - max_age
+    return AnalysisJob.objects.filter(
+        status=AnalysisJob.STATUS_RUNNING, started_at__lt=cutoff
+    ).update(status=AnalysisJob.STATUS_QUEUED, started_at=None)
+
+
+def requeue_job(job_id):
+    """Return a running job to the queue (its process died before it finished)"""
+    AnalysisJob.objects.filter(pk=job_id, status=AnalysisJob.STATUS_RUNNING).update(
+        status=AnalysisJob.STATUS_QUEUED, started_at=None
+    )
+
+
+def mark_failed(job_id, error):
+    AnalysisJob.objects.filter(pk=job_id).update(
+        status=AnalysisJob.STATUS_FAILED,
+        error=str(error)[:2000],
+        finished_at=timezone.now(),
+    )
+
+
+def run_job(job_id):
+    """Execute one claimed job (runs inside a pool process)"""
+    job = AnalysisJob.objects.select_related('log').get(pk=job_id)
+    if job.kind == AnalysisJob.KIND_ASSEMBLE:
+        return run_assembly(job)
+    try:
+        payload, _ = evaluate_log(job.log, job.params)
+    except Exception as e:
+        logger.error(f"Analysis job {job_id} failed: {e}")
+        mark_failed(job_id, e)
+        return AnalysisJob.STATUS_FAILED
+
+    AnalysisJob.objects.filter(pk=job_id).update(
+        status=AnalysisJob.STATUS_DONE,
+        result=json_compatible(payload),
+        error='',
+        finished_at=timezone.now(),
+    )
+    return AnalysisJob.STATUS_DONE
+
+
+def run_assembly(job):
+    """Assemble a job's upload session into a log; a failure reopens the session"""
+    try:
+        if job.upload_id is None:
+            raise ValueError("Upload session no longer exists")
+        session = UploadSession.objects.select_related('user').get(pk=job.upload_id)
+        uploaded_log, deduplicated = assemble_session(session, job.params.get('allowed_extensions'))
+    except Exception as e:
+        logger.error(f"Assembly job {job.id} failed: {e}")
+        mark_failed(job.id, e)
+        return AnalysisJob.STATUS_FAILED
+
+    AnalysisJob.objects.filter(pk=job.id).update(
+        status=AnalysisJob.STATUS_DONE,
+        log=uploaded_log,
+        result=upload_result(session, uploaded_log, deduplicated),
+        error='',
+        finished_at=timezone.now(),
+    )
+    return AnalysisJob.STATUS_DONE
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from analyzer.uploads import purge_stale_sessions, recover_stalled_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete chunked upload sessions that have been idle too long and reopen stalled assemblies"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int, default=settings.UPLOAD_SESSION_TTL,
+            help='Delete open sessions idle for longer than this many seconds'
+        )
+        parser.add_argument(
+            '--assembly-timeout', type=int, default=settings.UPLOAD_ASSEMBLY_TIMEOUT,
+            help='Reopen sessions that have been assembling for longer than this many seconds'
+        )
+
+    def handle(self, *args, **options):
+        recovered = recover_stalled_sessions(timedelta(seconds=options['assembly_timeout']))
+        if recovered:
+            self.stdout.write(f"Reopened {recovered} stalled upload session(s)")
+        purged = purge_stale_sessions(timedelta(seconds=options['max_age']))
+        self.stdout.write(f"Purged {purged} stale upload session(s)")
@@ -0,0 +1,111 @@
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from analyzer.jobs import claim_jobs, mark_failed, requeue_job, requeue_stale_jobs, run_job
+from analyzer.workers import init_worker_process
+
+# A job in flight when its pool broke this many times is failed instead of
+# requeued: it is most likely the one killing the process (e.g. OOM)
+MAX_JOB_CRASHES = 2
+
+
+class Command(BaseCommand):
+    help = "Run queued analysis jobs in a local process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.ANALYSIS_WORKER_PROCESSES,
+            help='Number of analysis processes'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Seconds to wait between queue polls when idle'
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=3600,
+            help='Requeue jobs that have been running longer than this many seconds'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is drained'
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        requeued = requeue_stale_jobs(timedelta(seconds=options['stale_after']))
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s)")
+
+        self.stdout.write(f"🚀 Analysis worker started with {workers} process(es)")
+        self.crashes = Counter()
+        pool = self._start_pool(workers)
+        in_flight = {}
+        try:
+            while True:
+                broken = False
+                free = workers - len(in_flight)
+                claimed = claim_jobs(free) if free else []
+                for position, job_id in enumerate(claimed):
+                    try:
+                        in_flight[pool.submit(run_job, job_id)] = job_id
+                    except BrokenProcessPool:
+                        # Not started anywhere: back to the queue as they were
+                        for unsubmitted in claimed[position:]:
+                            requeue_job(unsubmitted)
+                        broken = True
+                        break
+
+                if not in_flight and not broken:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+
+                done, _ = wait(in_flight, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = in_flight.pop(future)
+                    try:
+                        outcome = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        outcome = self._crashed(job_id)
+                    except Exception as e:
+                        # The job raised outside run_job's own error handling
+                        mark_failed(job_id, e)
+                        outcome = 'failed'
+                    self.stdout.write(f"Job {job_id}: {outcome}")
+
+                if broken:
+                    # Every job still in the dead pool is lost with it
+                    for job_id in in_flight.values():
+                        self.stdout.write(f"Job {job_id}: {self._crashed(job_id)}")
+                    in_flight = {}
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.stderr.write("Analysis process died, restarting the pool")
+                    pool = self._start_pool(workers)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _start_pool(self, workers):
+        # Spawned children start clean instead of inheriting DB connections
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker_process,
+        )
+
+    def _crashed(self, job_id):
+        """Requeue a job lost with its pool, or fail it if it keeps breaking pools"""
+        self.crashes[job_id] += 1
+        if self.crashes[job_id] >= MAX_JOB_CRASHES:
+            mark_failed(job_id, f"Analysis process crashed {self.crashes[job_id]} times (out of memory?)")
+            return 'failed'
+        requeue_job(job_id)
+        return 'requeued'
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from analyzer.models import AnalysisSummary, UploadedLog
+from analyzer.summaries import summarize_log
+
+
+class Command(BaseCommand):
+    help = "Write the per-group analysis summary of logs evaluated before summaries existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, default=None,
+            help='Only summarise the logs of this user id'
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Recompute the summaries of logs that already have them (after an analysis change)'
+        )
+        parser.add_argument(
+            '--failed', action='store_true',
+            help='Only retry the logs whose summary failed'
+        )
+
+    def handle(self, *args, **options):
+        logs = UploadedLog.objects.all()
+        if options['user'] is not None:
+            logs = logs.filter(user_id=options['user'])
+        if options['failed']:
+            logs = logs.filter(summary_state=UploadedLog.SUMMARY_FAILED)
+        if options['rebuild']:
+            AnalysisSummary.objects.filter(log__in=logs).delete()
+        else:
+            logs = logs.filter(summaries__isnull=True)
+
+        written = failed = 0
+        for uploaded_log in logs.iterator():
+            try:
+                written += summarize_log(uploaded_log, reuse_twin=not options['rebuild'])
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Log {uploaded_log.id}: {e}")
+        self.stdout.write(f"Summarised {written} log(s), {failed} failed")
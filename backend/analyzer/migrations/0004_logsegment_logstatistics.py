@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0003_analysisjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='logs/segments/')),
+                ('rows', models.PositiveBigIntegerField(default=0)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='analyzer.uploadedlog')),
+            ],
+            options={
+                'ordering': ['uploaded_at', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LogStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.JSONField(default=dict)),
+                ('segment_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('log', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='analyzer.uploadedlog')),
+            ],
+        ),
+    ]
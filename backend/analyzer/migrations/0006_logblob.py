@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0005_uploadsession_uploadchunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedlog',
+            name='original_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='uploadedlog',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='uploadedlog',
+            name='file',
+            field=models.FileField(max_length=255, upload_to='logs/'),
+        ),
+        migrations.CreateModel(
+            name='LogBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64)),
+                ('extension', models.CharField(blank=True, max_length=16)),
+                ('file', models.FileField(max_length=255, upload_to='blobs/')),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('sha256', 'extension'), name='unique_log_blob')],
+            },
+        ),
+        migrations.AddField(
+            model_name='uploadedlog',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='logs', to='analyzer.logblob'),
+        ),
+    ]
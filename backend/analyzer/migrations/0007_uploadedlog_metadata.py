@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:32
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_size(apps, schema_editor):
+    """Copy the size of stored logs once, so listings need not stat files"""
+    UploadedLog = apps.get_model('analyzer', 'UploadedLog')
+    LogBlob = apps.get_model('analyzer', 'LogBlob')
+    UploadedLog.objects.filter(blob__isnull=False).update(
+        size=Subquery(LogBlob.objects.filter(pk=OuterRef('blob_id')).values('size')[:1])
+    )
+    for log in UploadedLog.objects.filter(blob__isnull=True).only('id', 'file'):
+        try:
+            size = log.file.size
+        except (OSError, ValueError):
+            continue
+        UploadedLog.objects.filter(pk=log.pk).update(size=size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0006_logblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedlog',
+            name='analysis_state',
+            field=models.CharField(choices=[('uploaded', 'Uploaded'), ('analysed', 'Analysed'), ('failed', 'Failed')], default='uploaded', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='uploadedlog',
+            name='row_count',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadedlog',
+            name='size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_size, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0007_uploadedlog_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_type', models.CharField(max_length=64)),
+                ('rt_address', models.CharField(blank=True, default='', max_length=32)),
+                ('intervals', models.PositiveBigIntegerField(default=0)),
+                ('average_periodicity', models.FloatField(null=True)),
+                ('min_periodicity', models.FloatField(null=True)),
+                ('max_periodicity', models.FloatField(null=True)),
+                ('jitter_std_dev', models.FloatField(null=True)),
+                ('p50_periodicity', models.FloatField(null=True)),
+                ('p99_periodicity', models.FloatField(null=True)),
+                ('p999_periodicity', models.FloatField(null=True)),
+                ('log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='analyzer.uploadedlog')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['message_type', 'rt_address', 'jitter_std_dev'], name='analyzer_an_message_b34a45_idx'), models.Index(fields=['rt_address', 'jitter_std_dev'], name='analyzer_an_rt_addr_aa0df6_idx')],
+                'constraints': [models.UniqueConstraint(fields=('log', 'message_type', 'rt_address'), name='unique_analysis_summary')],
+            },
+        ),
+    ]
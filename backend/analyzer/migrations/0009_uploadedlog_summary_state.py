@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:11
+
+from django.db import migrations, models
+
+
+def backfill_summary_state(apps, schema_editor):
+    """Logs that already have summary rows are done"""
+    UploadedLog = apps.get_model('analyzer', 'UploadedLog')
+    UploadedLog.objects.filter(summaries__isnull=False).update(summary_state='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0008_analysissummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedlog',
+            name='summary_state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(backfill_summary_state, migrations.RunPython.noop),
+    ]
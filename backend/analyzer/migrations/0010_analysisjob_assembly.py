@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0009_uploadedlog_summary_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='kind',
+            field=models.CharField(choices=[('evaluate', 'Evaluate'), ('assemble', 'Assemble upload')], default='evaluate', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='upload',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assembly_jobs', to='analyzer.uploadsession'),
+        ),
+        migrations.AlterField(
+            model_name='analysisjob',
+            name='log',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='analysis_jobs', to='analyzer.uploadedlog'),
+        ),
+    ]
@@ -1,22 +1,79 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings 
 
 
+class LogBlob(models.Model):
+    """
+    One stored copy of an uploaded file, addressed by its SHA-256.
+    Every UploadedLog with the same content points at the same blob.
+    """
+    sha256 = models.CharField(max_length=64)
+    extension = models.CharField(max_length=16, blank=True)  # Parsers dispatch on it
+    file = models.FileField(upload_to='blobs/', max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['sha256', 'extension'], name='unique_log_blob'),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]}{self.extension} ({self.ref_count} refs)"
+
+
 class UploadedLog(models.Model):
     """
     Clean model for uploaded log files with performance optimizations
     """
+    STATE_UPLOADED = 'uploaded'
+    STATE_ANALYSED = 'analysed'
+    STATE_FAILED = 'failed'
+    STATE_CHOICES = [
+        (STATE_UPLOADED, 'Uploaded'),
+        (STATE_ANALYSED, 'Analysed'),
+        (STATE_FAILED, 'Failed'),
+    ]
+    SUMMARY_PENDING = 'pending'
+    SUMMARY_DONE = 'done'
+    SUMMARY_FAILED = 'failed'
+    SUMMARY_STATE_CHOICES = [
+        (SUMMARY_PENDING, 'Pending'),
+        (SUMMARY_DONE, 'Done'),
+        (SUMMARY_FAILED, 'Failed'),
+    ]
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE,
         db_index=True  # Performance: Index for faster queries
     )
-    file = models.FileField(upload_to='logs/')
+    file = models.FileField(upload_to='logs/', max_length=255)
+    original_name = models.CharField(max_length=255, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    blob = models.ForeignKey(
+        LogBlob,
+        on_delete=models.PROTECT,  # Released through reference counting
+        null=True,
+        blank=True,
+        related_name='logs'
+    )
     uploaded_at = models.DateTimeField(
         auto_now_add=True,
         db_index=True  # Performance: Index for time-based queries
     )
+    # Performance: Stored at ingest/first analysis so listings never stat
+    # or open the file
+    size = models.PositiveBigIntegerField(default=0)
+    row_count = models.PositiveBigIntegerField(null=True, blank=True)  # Unknown until parsed
+    analysis_state = models.CharField(max_length=10, choices=STATE_CHOICES, default=STATE_UPLOADED)
+    # Whether the AnalysisSummary rows were written; failed logs are retried
+    # by `summarize_logs --failed`
+    summary_state = models.CharField(max_length=10, choices=SUMMARY_STATE_CHOICES, default=SUMMARY_PENDING)
 
     class Meta:
         # Performance: Composite indexes for common queries
@@ -31,6 +88,220 @@ class UploadedLog(models.Model):
         return f"{self.user.email} - {self.file.name}"
 
 
+class AnalysisJob(models.Model):
+    """
+    Background work run by the analysis worker: the evaluation of an
+    uploaded log, or the assembly of a chunked upload into a log
+    """
+    KIND_EVALUATE = 'evaluate'
+    KIND_ASSEMBLE = 'assemble'
+    KIND_CHOICES = [
+        (KIND_EVALUATE, 'Evaluate'),
+        (KIND_ASSEMBLE, 'Assemble upload'),
+    ]
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='analysis_jobs'
+    )
+    log = models.ForeignKey(
+        UploadedLog,
+        on_delete=models.CASCADE,
+        related_name='analysis_jobs',
+        null=True,  # An assembly job gets its log once the upload is assembled
+        blank=True
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_EVALUATE)
+    upload = models.ForeignKey(
+        'UploadSession',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='assembly_jobs'
+    )
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Performance: Worker polls the oldest queued jobs
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['user', '-created_at']),
+        ]
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.status}) - log {self.log_id}"
+
+
+class LogSegment(models.Model):
+    """
+    A later piece of a capture appended to an uploaded log
+    """
+    log = models.ForeignKey(
+        UploadedLog,
+        on_delete=models.CASCADE,
+        related_name='segments'
+    )
+    file = models.FileField(upload_to='logs/segments/')
+    rows = models.PositiveBigIntegerField(default=0)
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['uploaded_at', 'id']
+
+    def __str__(self):
+        return f"Segment {self.pk} of log {self.log_id}"
+
+
+class LogStatistics(models.Model):
+    """
+    Mergeable per-group accumulators (count/sum/M2/min/max, histogram,
+    quantile sketch, first/last timestamp) covering a log and all of its
+    segments
+    """
+    log = models.OneToOneField(
+        UploadedLog,
+        on_delete=models.CASCADE,
+        related_name='statistics'
+    )
+    state = models.JSONField(default=dict)
+    segment_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Statistics of log {self.log_id} ({self.segment_count} segments)"
+
+
+class AnalysisSummary(models.Model):
+    """
+    Interval statistics of one group of a log, kept so cross-log questions
+    ("which captures had jitter > 2 ms on RT5") are a single SQL query.
+    A log has one row per message type (rt_address '') and one per
+    (message_type, rt_address) pair.
+    """
+    log = models.ForeignKey(
+        UploadedLog,
+        on_delete=models.CASCADE,
+        related_name='summaries'
+    )
+    message_type = models.CharField(max_length=64)
+    rt_address = models.CharField(max_length=32, blank=True, default='')  # '' = every RT
+    intervals = models.PositiveBigIntegerField(default=0)
+    average_periodicity = models.FloatField(null=True)
+    min_periodicity = models.FloatField(null=True)
+    max_periodicity = models.FloatField(null=True)
+    jitter_std_dev = models.FloatField(null=True)
+    p50_periodicity = models.FloatField(null=True)
+    p99_periodicity = models.FloatField(null=True)
+    p999_periodicity = models.FloatField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['log', 'message_type', 'rt_address'], name='unique_analysis_summary'),
+        ]
+        indexes = [
+            # Performance: Fleet queries filter on the group, then a metric
+            models.Index(fields=['message_type', 'rt_address', 'jitter_std_dev']),
+            models.Index(fields=['rt_address', 'jitter_std_dev']),
+        ]
+
+    def __str__(self):
+        return f"Summary of log {self.log_id}: {self.message_type} {self.rt_address}".rstrip()
+
+
+class UploadSession(models.Model):
+    """
+    A chunked, resumable upload. Chunks are stored on disk as they arrive
+    and assembled into an UploadedLog when the session is completed.
+    """
+    STATUS_OPEN = 'open'
+    STATUS_ASSEMBLING = 'assembling'
+    STATUS_COMPLETE = 'complete'
+    STATUS_CHOICES = [
+        (STATUS_OPEN, 'Open'),
+        (STATUS_ASSEMBLING, 'Assembling'),
+        (STATUS_COMPLETE, 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)  # Expected digest, if the client sent one
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    log = models.ForeignKey(
+        UploadedLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['status', 'updated_at']),  # Stale session cleanup
+        ]
+
+    @property
+    def total_chunks(self):
+        return max(-(-self.size // self.chunk_size), 1)
+
+    def expected_chunk_size(self, index):
+        if index < self.total_chunks - 1:
+            return self.chunk_size
+        return self.size - self.chunk_size * (self.total_chunks - 1)
+
+    def __str__(self):
+        return f"Upload {self.pk} ({self.status}) - {self.filename}"
+
+
+class UploadChunk(models.Model):
+    """One received chunk of an upload session"""
+    session = models.ForeignKey(
+        UploadSession,
+        on_delete=models.CASCADE,
+        related_name='chunks'
+    )
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='unique_upload_chunk'),
+        ]
+        ordering = ['index']
+
+    def __str__(self):
+        return f"Chunk {self.index} of upload {self.session_id}"
+
+
 class CustomUser(AbstractUser):
     """
     Clean custom user model with email authentication
@@ -0,0 +1,338 @@
+"""
+Parsers for raw bus-monitor captures and exported workbooks.
+
+``.mil`` files are fixed-size MIL-STD-1553B monitor records (optionally
+preceded by a 16-byte header). Records are decoded straight into numpy
+structured arrays, either memory-mapped from disk or read in buffered
+chunks from a stream, so no Python object is created per message.
+
+``.xlsx`` workbooks are streamed row by row in openpyxl's read-only mode
+and only the requested columns are kept, as typed numpy arrays.
+"""
+import datetime
+import os
+from itertools import islice, zip_longest
+
+import numpy as np
+import pandas as pd
+
+from .analysis import NS_PER_SECOND
+
+# One monitored bus transaction (80 bytes, little-endian)
+MIL_RECORD_DTYPE = np.dtype([
+    ('timestamp_us', '<u8'),     # microseconds since midnight of the capture day
+    ('bus', 'u1'),               # 0 = bus A, 1 = bus B
+    ('flags', 'u1'),             # bit 0: word/parity error reported by the monitor
+    ('word_count', '<u2'),       # number of valid entries in data_words
+    ('command_word', '<u2'),
+    ('status_word', '<u2'),
+    ('data_words', '<u2', (32,)),
+])
+
+# Optional header: magic, record size (uint32), reserved (uint32)
+MIL_MAGIC = b'MIL1553\x00'
+MIL_HEADER_SIZE = 16
+MIL_CHUNK_RECORDS = 64 * 1024
+
+
+class MilFormatError(ValueError):
+    """Raised when a capture does not match the monitor record layout"""
+
+
+def _header_size(head):
+    if not head.startswith(MIL_MAGIC):
+        return 0
+    record_size = int.from_bytes(head[8:12], 'little')
+    if record_size != MIL_RECORD_DTYPE.itemsize:
+        raise MilFormatError(
+            f"Unsupported record size {record_size} (expected {MIL_RECORD_DTYPE.itemsize})"
+        )
+    return MIL_HEADER_SIZE
+
+
+def read_mil(path, max_records=None):
+    """Memory-map every record of a capture as a structured array"""
+    with open(path, 'rb') as f:
+        offset = _header_size(f.read(MIL_HEADER_SIZE))
+
+    payload = os.path.getsize(path) - offset
+    if payload % MIL_RECORD_DTYPE.itemsize:
+        raise MilFormatError("File size is not a whole number of monitor records")
+
+    count = payload // MIL_RECORD_DTYPE.itemsize
+    if max_records is not None:
+        count = min(count, max_records)
+    if count == 0:
+        return np.empty(0, dtype=MIL_RECORD_DTYPE)
+    return np.memmap(path, dtype=MIL_RECORD_DTYPE, mode='r', offset=offset, shape=(count,))
+
+
+def iter_mil_chunks(stream, chunk_records=MIL_CHUNK_RECORDS):
+    """Yield structured arrays of records from a binary stream"""
+    record_size = MIL_RECORD_DTYPE.itemsize
+    buffer = bytearray(chunk_records * record_size)
+    view = memoryview(buffer)
+
+    head = stream.read(MIL_HEADER_SIZE)
+    pending = head[_header_size(head):]
+    view[:len(pending)] = pending
+    filled = len(pending)
+
+    while True:
+        while filled < len(buffer):
+            read = stream.readinto(view[filled:])
+            if not read:
+                break
+            filled += read
+
+        whole = filled - filled % record_size
+        if whole:
+            yield np.frombuffer(buffer, dtype=MIL_RECORD_DTYPE, count=whole // record_size).copy()
+        if filled < len(buffer):
+            if filled != whole:
+                raise MilFormatError("Truncated monitor record at end of stream")
+            return
+        filled = 0
+
+
+def read_mil_stream(stream, max_records=None):
+    """Read records from a (possibly decompressing) stream, stopping at max_records"""
+    chunks = []
+    count = 0
+    for chunk in iter_mil_chunks(stream):
+        if max_records is not None and count + len(chunk) >= max_records:
+            chunks.append(chunk[:max_records - count])
+            break
+        chunks.append(chunk)
+        count += len(chunk)
+    if not chunks:
+        return np.empty(0, dtype=MIL_RECORD_DTYPE)
+    return np.concatenate(chunks)
+
+
+def decode_mil(records):
+    """
+    Decode monitor records into the analysis columns.
+
+    The 1553B command word is split with vectorized bit operations and each
+    distinct (RT, T/R, subaddress) gets a categorical ``message_type`` label.
+    """
+    command = records['command_word'].astype(np.uint16)
+    rt_address = (command >> 11).astype(np.uint8)
+    transmit = ((command >> 10) & 0x1).astype(np.uint8)
+    subaddress = ((command >> 5) & 0x1F).astype(np.uint8)
+
+    # Label each distinct command once, not once per record
+    keys = command >> 5
+    unique_keys, codes = np.unique(keys, return_inverse=True)
+    labels = [
+        f"RT{key >> 6:02d}-{'T' if (key >> 5) & 1 else 'R'}-"
+        + ('MC' if (key & 0x1F) in (0, 31) else f"SA{key & 0x1F:02d}")
+        for key in unique_keys.tolist()
+    ]
+
+    word_count = records['word_count'].astype(np.uint16)
+    data_words = records['data_words']
+    first_word = np.where(word_count > 0, data_words[:, 0] if len(records) else 0, 0)
+
+    return pd.DataFrame({
+        'timestamp_ns': records['timestamp_us'].astype(np.int64) * (NS_PER_SECOND // 1_000_000),
+        'message_type': pd.Categorical.from_codes(codes.astype(np.int32), labels),
+        'rt_address': rt_address,
+        'subaddress': subaddress,
+        'transmit': transmit,
+        'bus': records['bus'],
+        'word_count': word_count,
+        'command_word': command,
+        'status_word': records['status_word'].astype(np.uint16),
+        'data_word': first_word.astype(np.uint16),
+        'error': (records['flags'] & 0x1).astype(bool),
+    })
+
+
+def parse_mil(source, max_records=None):
+    """Decode a capture given as a path (memory-mapped) or a binary stream"""
+    try:
+        if hasattr(source, 'read'):
+            return decode_mil(read_mil_stream(source, max_records=max_records))
+        return decode_mil(read_mil(source, max_records=max_records))
+    except (OSError, MilFormatError) as e:
+        print(f"[Error parsing MIL capture]: {e}")
+        return None
+
+
+XLSX_BLOCK_ROWS = 16 * 1024
+# read_xlsx(sheets=ALL_SHEETS) reads every sheet with the first sheet's header
+ALL_SHEETS = 'all'
+
+
+def _open_workbook(source):
+    from openpyxl import load_workbook
+
+    return load_workbook(source, read_only=True, data_only=True, keep_links=False)
+
+
+def _header_names(header):
+    """Column names as pandas builds them: blanks unnamed, duplicates suffixed"""
+    names = []
+    seen = {}
+    for position, value in enumerate(header):
+        name = f'Unnamed: {position}' if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _trimmed(row):
+    end = len(row)
+    while end and row[end - 1] is None:
+        end -= 1
+    return row[:end]
+
+
+def _data_rows(rows):
+    """Sheet rows without the trailing empty ones (empty rows in between stay)"""
+    pending = 0
+    for row in rows:
+        if any(value is not None for value in row):
+            yield from [()] * pending
+            pending = 0
+            yield row
+        else:
+            pending += 1
+
+
+def xlsx_columns(source, sheets=None):
+    """Column names read_xlsx(sheets=...) produces for a workbook (reads header rows only)"""
+    workbook = _open_workbook(source)
+    try:
+        worksheets = workbook.worksheets if sheets == ALL_SHEETS else workbook.worksheets[:1]
+        headers = [
+            _header_names(_trimmed(next(worksheet.iter_rows(max_row=1, values_only=True), ())))
+            for worksheet in worksheets
+        ]
+    finally:
+        workbook.close()
+    if not headers:
+        return []
+    names = headers[0]
+    if headers.count(names) > 1 and 'sheet' not in names:
+        names = names + ['sheet']
+    return names
+
+
+def _typed_block(values):
+    """One block of cell values as the narrowest numpy array that holds them"""
+    kinds = set(map(type, values))
+    if kinds == {int}:
+        return np.array(values, dtype=np.int64)
+    if kinds <= {int, float, type(None)}:
+        return np.array(values, dtype=np.float64)  # None becomes NaN
+    if kinds == {bool}:
+        return np.array(values, dtype=bool)
+    block = np.empty(len(values), dtype=object)
+    block[:] = values
+    block[np.equal(block, None)] = np.nan
+    return block
+
+
+def _join_blocks(blocks):
+    if not blocks:
+        return np.empty(0, dtype=object)
+    if any(block.dtype == object for block in blocks):
+        column = np.concatenate([block.astype(object) for block in blocks])
+    else:
+        column = np.concatenate(blocks)
+    if column.dtype == np.float64 and len(column) and not np.isnan(column).any() \
+            and (column == np.floor(column)).all() and np.abs(column).max() < 2 ** 63:
+        # Whole numbers read back as integers, as pandas does
+        column = column.astype(np.int64)
+    elif column.dtype == object and len(column) and all(
+        isinstance(value, datetime.datetime) for value in column
+    ):
+        column = column.astype('datetime64[ns]')
+    return column
+
+
+def read_xlsx(source, usecols=None, max_rows=None, sheets=None):
+    """
+    Stream a workbook into a DataFrame without materialising every cell.
+
+    Rows are read in read-only mode, ``XLSX_BLOCK_ROWS`` at a time; each
+    block is transposed, cut down to ``usecols`` (names, or a predicate on
+    the name) and converted to a typed array before the next is read.
+    Only the first sheet is read by default. ``sheets`` is either a list
+    of sheet names or ALL_SHEETS for every sheet with the first sheet's
+    header (e.g. one sheet per bus); a ``sheet`` column tells them apart
+    when there is more than one. Rows of different sheets are simply
+    concatenated, so intervals are only meaningful per sheet. Reading stops
+    after ``max_rows`` data rows.
+    """
+    workbook = _open_workbook(source)
+    try:
+        if sheets is None:
+            worksheets = workbook.worksheets[:1]
+        elif sheets == ALL_SHEETS:
+            worksheets = workbook.worksheets
+        else:
+            worksheets = [workbook[name] for name in sheets]
+
+        names = None
+        blocks = None
+        sheet_rows = []
+        remaining = max_rows
+        for worksheet in worksheets:
+            if remaining == 0:
+                break
+            worksheet.reset_dimensions()
+            rows = worksheet.iter_rows(values_only=True)
+            header = _header_names(_trimmed(next(rows, ())))
+            if names is None:
+                names = header
+                if usecols is None:
+                    keep = list(range(len(names)))
+                elif callable(usecols):
+                    keep = [i for i, name in enumerate(names) if usecols(name)]
+                else:
+                    wanted = set(usecols)
+                    keep = [i for i, name in enumerate(names) if name in wanted]
+                blocks = [[] for _ in keep]
+            elif header != names:
+                if sheets != ALL_SHEETS:
+                    raise ValueError(f"Sheet '{worksheet.title}' has different columns")
+                continue
+
+            count = 0
+            rows = _data_rows(rows)
+            while remaining is None or remaining > 0:
+                size = XLSX_BLOCK_ROWS if remaining is None else min(XLSX_BLOCK_ROWS, remaining)
+                block = list(islice(rows, size))
+                if not block:
+                    break
+                # Performance: One C-level transpose per block, then only the
+                # kept columns are converted (the rest are dropped here)
+                columns = list(zip_longest(*block, fillvalue=None))
+                for target, position in zip(blocks, keep):
+                    values = columns[position] if position < len(columns) else (None,) * len(block)
+                    target.append(_typed_block(values))
+                count += len(block)
+                if remaining is not None:
+                    remaining -= len(block)
+            sheet_rows.append((worksheet.title, count))
+    finally:
+        workbook.close()
+
+    if names is None:
+        return pd.DataFrame()
+
+    data = {names[position]: _join_blocks(target) for position, target in zip(keep, blocks)}
+    wants_sheet = usecols is None or (usecols('sheet') if callable(usecols) else 'sheet' in usecols)
+    if len(sheet_rows) > 1 and 'sheet' not in names and wants_sheet:
+        titles = [title for title, _ in sheet_rows]
+        codes = np.repeat(np.arange(len(titles), dtype=np.int32), [count for _, count in sheet_rows])
+        data['sheet'] = pd.Categorical.from_codes(codes, titles)
+    return pd.DataFrame(data, copy=False)
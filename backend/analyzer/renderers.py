@@ -0,0 +1,48 @@
+"""
+JSON rendering for API responses.
+
+orjson encodes the payload in one native pass: numpy scalars and arrays
+are serialized directly, and NaN/inf become null, so responses need no
+separate Python walk to make them JSON compliant.
+"""
+import numpy as np
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_fallback = JSONEncoder()
+
+
+def _default(obj):
+    """Types orjson does not handle natively (lazy strings, Decimal, ...)"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return _fallback.default(obj)
+
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def json_compatible(data):
+    """
+    The data as the API renders it (numpy values as Python ones, NaN/inf
+    as None), for storing payloads in JSONFields: the stdlib encoder
+    Django uses writes NaN, which is not JSON and which Postgres rejects.
+    """
+    # Performance: One native encode/decode instead of a Python walk
+    return orjson.loads(orjson.dumps(data, default=_default, option=_OPTIONS))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in replacement for DRF's JSONRenderer backed by orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        option = _OPTIONS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
@@ -0,0 +1,95 @@
+"""
+Row selection for evaluations restricted to a time window or to some
+message types / RT addresses.
+
+Each log gets a persistent timestamp index next to its sidecar: the
+parsed timestamps in sorted order plus the row each one came from. A
+window is two binary searches into that index, so narrowing an analysis
+to one test phase costs time proportional to the rows in the window,
+not to the capture length.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .analysis import DAY_NS, parse_timestamps, timestamps_from_frame
+from .storage import read_sidecar, read_timestamp_index, write_timestamp_index
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that select rows, and the columns they filter on
+FILTER_COLUMNS = ('message_type', 'rt_address')
+
+
+def parse_clock(value):
+    """'HH:MM:SS[.ffffff]' as nanoseconds since midnight, or None if invalid"""
+    parsed = parse_timestamps(np.array([str(value).strip()], dtype=object))
+    if not parsed.valid[0] or parsed.missing[0]:
+        return None
+    return int(parsed.ns[0])
+
+
+def build_timestamp_index(timestamps):
+    """Sorted (ns, row) pairs of every row with a parsable timestamp"""
+    series = pd.Series(timestamps, copy=False)
+    if series.hasnans:
+        series = series.fillna(0)
+    _, parsed = timestamps_from_frame(series.to_frame(series.name or 'timestamp'))
+    rows = np.flatnonzero(parsed.valid & ~parsed.missing)
+    order = np.argsort(parsed.ns[rows], kind='stable')
+    return parsed.ns[rows][order], rows[order]
+
+
+def timestamp_index(uploaded_log, timestamp_col, frame=None):
+    """
+    Load the log's timestamp index, building it on first use from the
+    sidecar (or from `frame` when no sidecar could be written).
+    """
+    index = read_timestamp_index(uploaded_log)
+    if index is not None:
+        return index
+
+    if frame is None:
+        frame = read_sidecar(uploaded_log, columns=[timestamp_col])
+    ns, rows = build_timestamp_index(frame[timestamp_col])
+    try:
+        write_timestamp_index(uploaded_log, ns, rows)
+    except Exception:
+        logger.exception(f"Timestamp index write failed for log {uploaded_log.id}")
+    return ns, rows
+
+
+def window_rows(index, start=None, end=None):
+    """
+    Rows (in file order) whose timestamp lies in [start, end], both given
+    as ns since midnight. A window with end before start runs past
+    midnight, and windows are matched on the capture's unrolled clock.
+    """
+    ns, rows = index
+    if len(ns) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    first = int(ns[0])
+    spans_midnight = int(ns[-1]) >= DAY_NS
+    lo_ns = -np.inf if start is None else start
+    hi_ns = np.inf if end is None else end
+    if start is not None and spans_midnight and start < first:
+        lo_ns += DAY_NS
+    if end is not None and ((start is not None and end < start) or (spans_midnight and end < first)):
+        hi_ns += DAY_NS
+
+    lo = 0 if start is None else np.searchsorted(ns, lo_ns, side='left')
+    hi = len(ns) if end is None else np.searchsorted(ns, hi_ns, side='right')
+    # Performance: Only the window's positions are touched and re-sorted
+    return np.sort(rows[lo:hi])
+
+
+def filter_mask(series, values):
+    """Rows of a column matching any of `values`, compared as strings"""
+    wanted = {str(value) for value in values}
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Performance: Match the categories once, then compare integer codes
+        hits = [code for code, category in enumerate(series.cat.categories) if str(category) in wanted]
+        return np.isin(series.cat.codes.to_numpy(), hits)
+    return series.astype(str).isin(wanted).to_numpy()
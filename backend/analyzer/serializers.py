@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .blobs import store_log
 from .models import UploadedLog
 from django.contrib.auth import get_user_model
 
@@ -12,7 +13,9 @@ class UploadedLogSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         user = self.context['request'].user
-        return UploadedLog.objects.create(user=user, **validated_data)
+        content = validated_data['file']
+        uploaded_log, _ = store_log(user, content.name, self.context.get('sha256'), content=content)
+        return uploaded_log
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -0,0 +1,64 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user_state
+from .blobs import release_blob
+from .cache import invalidate_log
+from .models import AnalysisSummary, CustomUser, LogStatistics, UploadedLog
+from .storage import remove_sidecar
+
+
+def release_content(uploaded_log):
+    """
+    Drop a log's hold on its content: its cached analysis and sidecar go
+    unless other logs share the blob.
+    """
+    if uploaded_log.blob_id:
+        # Shared content: results and sidecar stay while other logs use them
+        if release_blob(uploaded_log):
+            invalidate_log(uploaded_log)
+        return
+    invalidate_log(uploaded_log)
+    if uploaded_log.file:
+        remove_sidecar(uploaded_log)
+
+
+@receiver(post_delete, sender=UploadedLog)
+def uploaded_log_deleted(sender, instance, **kwargs):
+    """Drop cached analysis and the columnar sidecar of a deleted log"""
+    release_content(instance)
+
+
+@receiver(pre_save, sender=UploadedLog)
+def uploaded_log_replaced(sender, instance, **kwargs):
+    """
+    Detach a log whose file is swapped out from its old content: release
+    the blob, forget the old digest (content_hash rehashes the new file) and
+    drop statistics and summaries of the old content.
+    """
+    if not instance.pk:
+        return
+    previous = UploadedLog.objects.filter(pk=instance.pk).first()
+    if previous is None or previous.file.name == instance.file.name:
+        return
+    release_content(previous)
+    if instance.blob_id == previous.blob_id:
+        instance.blob = None
+    if instance.sha256 == previous.sha256:
+        instance.sha256 = ''
+    instance.row_count = None
+    instance.analysis_state = UploadedLog.STATE_UPLOADED
+    instance.summary_state = UploadedLog.SUMMARY_PENDING
+    try:
+        instance.size = instance.file.size
+    except OSError:
+        pass
+    LogStatistics.objects.filter(log_id=instance.pk).delete()
+    AnalysisSummary.objects.filter(log_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    """Make token authentication re-read a changed or deleted user's state"""
+    invalidate_user_state(instance.pk)
@@ -0,0 +1,135 @@
+"""
+Mergeable quantile sketches of interval distributions (DDSketch style).
+
+An interval x lands in bucket ceil(log_gamma(x)) with
+gamma = (1 + alpha) / (1 - alpha), so any quantile read back is within a
+relative error alpha of the true one. Buckets are a dense count array
+plus its first index: updates are one vectorized bincount, merges add two
+arrays, and 1 µs .. 100 s at 1% accuracy needs under a thousand buckets
+however long the capture is.
+
+Sketches serve the streaming engines, which never hold every interval;
+the in-memory analysis computes exact percentiles instead.
+"""
+import math
+
+import numpy as np
+
+# Relative accuracy of every reported quantile
+SKETCH_ALPHA = 0.01
+# Quantiles reported next to the mean/min/max/std, and their result keys
+REPORTED_QUANTILES = (
+    (0.5, 'p50_periodicity'),
+    (0.99, 'p99_periodicity'),
+    (0.999, 'p999_periodicity'),
+)
+# Intervals at or below this (and negative ones) count as zero
+MIN_INDEXABLE = 1e-9
+
+_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+_LOG_GAMMA = math.log(_GAMMA)
+
+
+def bucket_index(values):
+    """Bucket of every positive value"""
+    return np.ceil(np.log(values) / _LOG_GAMMA).astype(np.int64)
+
+
+def bucket_value(index):
+    """Representative value of a bucket (relative error <= alpha)"""
+    return 2 * _GAMMA ** np.asarray(index, dtype=np.float64) / (_GAMMA + 1)
+
+
+class QuantileSketch:
+    """Bucket counts of one group's intervals"""
+
+    __slots__ = ('offset', 'counts', 'zero')
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero = 0
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.zero
+
+    def update(self, intervals):
+        """Fold a batch of intervals in with one bincount"""
+        intervals = np.asarray(intervals, dtype=np.float64)
+        positive = intervals > MIN_INDEXABLE
+        self.zero += int(np.count_nonzero(~positive & ~np.isnan(intervals)))
+        if not positive.any():
+            return
+        index = bucket_index(intervals[positive])
+        low = int(index.min())
+        self._add(low, np.bincount(index - low))
+
+    def merge(self, other):
+        self.zero += other.zero
+        if len(other.counts):
+            self._add(other.offset, other.counts)
+
+    def _add(self, offset, counts):
+        if not len(self.counts):
+            self.offset, self.counts = offset, counts.astype(np.int64)
+            return
+        low = min(self.offset, offset)
+        high = max(self.offset + len(self.counts), offset + len(counts))
+        if low != self.offset or high != self.offset + len(self.counts):
+            grown = np.zeros(high - low, dtype=np.int64)
+            grown[self.offset - low:self.offset - low + len(self.counts)] = self.counts
+            self.offset, self.counts = low, grown
+        self.counts[offset - low:offset - low + len(counts)] += counts
+
+    def quantiles(self, qs):
+        """Values at the quantiles `qs` (None when the sketch is empty)"""
+        total = self.count
+        if total == 0:
+            return [None] * len(qs)
+        ranks = np.asarray(qs, dtype=np.float64) * (total - 1)
+        cumulative = self.zero + np.cumsum(self.counts)
+        positions = np.searchsorted(cumulative, ranks, side='right')
+        values = bucket_value(self.offset + np.minimum(positions, len(self.counts) - 1))
+        return np.where(ranks < self.zero, 0.0, values).tolist()
+
+    def summary(self, minimum=None, maximum=None):
+        """
+        REPORTED_QUANTILES keyed like the other statistics. Bucket values
+        are clamped to the observed [minimum, maximum] when given, so e.g.
+        an exactly periodic group reports its period rather than a
+        bucket midpoint just below it.
+        """
+        values = self.quantiles([q for q, _ in REPORTED_QUANTILES])
+        summary = {}
+        for (_, key), value in zip(REPORTED_QUANTILES, values):
+            if value is None:
+                summary[key] = 0
+                continue
+            if minimum is not None:
+                value = max(value, minimum)
+            if maximum is not None:
+                value = min(value, maximum)
+            summary[key] = round(value, 6)
+        return summary
+
+    def to_dict(self):
+        # Only the occupied span of buckets is stored
+        occupied = np.flatnonzero(self.counts)
+        if len(occupied) == 0:
+            return {'offset': 0, 'counts': [], 'zero': self.zero}
+        first, last = occupied[0], occupied[-1] + 1
+        return {
+            'offset': self.offset + int(first),
+            'counts': self.counts[first:last].tolist(),
+            'zero': self.zero,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.offset = data['offset']
+        sketch.counts = np.asarray(data['counts'], dtype=np.int64)
+        sketch.zero = data['zero']
+        return sketch
+
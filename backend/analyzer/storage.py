@@ -0,0 +1,212 @@
+"""
+Columnar sidecar storage for uploaded logs.
+
+Each parsed log is written once next to its upload as a directory of
+``.npy`` column files plus a ``manifest.json``. Numeric columns are
+memory-mapped back on load, so repeated evaluations never re-read the
+original spreadsheet.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the parser or the on-disk layout changes; stale sidecars
+# are rebuilt automatically.
+SIDECAR_VERSION = 2
+SIDECAR_SUFFIX = '.cols'
+MANIFEST_NAME = 'manifest.json'
+INDEX_NS_NAME = 'index.ns.npy'
+INDEX_ROWS_NAME = 'index.rows.npy'
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Stream a file through SHA-256 without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def sidecar_path(uploaded_log):
+    """Directory holding the columnar copy of an upload"""
+    return uploaded_log.file.path + SIDECAR_SUFFIX
+
+
+def _source_stamp(file_path):
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _is_plain_array(series):
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM'
+
+
+def write_sidecar(uploaded_log, df, all_columns=None):
+    """
+    Persist a parsed DataFrame as memory-mappable column files.
+    ``all_columns`` marks a partial sidecar holding only some columns of
+    the log (the analysis columns of a log too large to load whole).
+    """
+    target = sidecar_path(uploaded_log)
+    parent = os.path.dirname(target)
+    workdir = tempfile.mkdtemp(prefix='.cols-', dir=parent)
+
+    try:
+        columns = []
+        for index, name in enumerate(df.columns):
+            series = df[name]
+            entry = {'name': name if isinstance(name, (str, int, float)) else str(name)}
+
+            if _is_plain_array(series):
+                entry.update({'kind': 'array', 'data': f'{index}.npy'})
+                np.save(os.path.join(workdir, entry['data']), series.to_numpy())
+            else:
+                # Strings / mixed cells: integer codes + unique labels
+                codes, uniques = pd.factorize(series, use_na_sentinel=True)
+                labels = np.asarray([str(value) for value in uniques], dtype=str)
+                entry.update({
+                    'kind': 'codes',
+                    'data': f'{index}.codes.npy',
+                    'labels': f'{index}.labels.npy',
+                })
+                np.save(os.path.join(workdir, entry['data']), codes.astype(np.int32))
+                np.save(os.path.join(workdir, entry['labels']), labels)
+
+            columns.append(entry)
+
+        manifest = {
+            'version': SIDECAR_VERSION,
+            'source': _source_stamp(uploaded_log.file.path),
+            'rows': len(df),
+            'columns': columns,
+        }
+        if all_columns is not None:
+            manifest['all_columns'] = [
+                name if isinstance(name, (str, int, float)) else str(name) for name in all_columns
+            ]
+        with open(os.path.join(workdir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f)
+
+        remove_sidecar(uploaded_log)
+        os.replace(workdir, target)
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+
+def read_manifest(uploaded_log):
+    """Return the sidecar manifest, or None when missing or stale"""
+    path = os.path.join(sidecar_path(uploaded_log), MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get('version') != SIDECAR_VERSION:
+        return None
+    try:
+        if manifest.get('source') != _source_stamp(uploaded_log.file.path):
+            return None
+    except OSError:
+        return None
+    return manifest
+
+
+def read_sidecar(uploaded_log, columns=None, categorical=(), rows=None):
+    """
+    Load the columnar copy of a log as a DataFrame.
+    Numeric columns stay memory-mapped (read-only, zero-copy). Only
+    ``columns`` are loaded when given; string columns named in
+    ``categorical`` come back as Categoricals built straight from the
+    stored codes instead of one Python string per row. ``rows`` (sorted
+    positions) reads just those rows.
+    """
+    manifest = read_manifest(uploaded_log)
+    if manifest is None:
+        return None
+    stored = [entry['name'] for entry in manifest['columns']]
+    if 'all_columns' in manifest and (columns is None or not set(columns) <= set(stored)):
+        return None
+
+    base = sidecar_path(uploaded_log)
+    data = {}
+    try:
+        for entry in manifest['columns']:
+            if columns is not None and entry['name'] not in columns:
+                continue
+            values = np.load(os.path.join(base, entry['data']), mmap_mode='r')
+            if rows is not None:
+                values = values[rows]
+            if entry['kind'] == 'codes':
+                labels = np.load(os.path.join(base, entry['labels']), mmap_mode='r')
+                if rows is not None and len(labels):
+                    # Performance: Decode only the labels the selected rows use
+                    present = np.unique(values[values >= 0])
+                    labels = labels[present]
+                    values = np.where(values >= 0, np.searchsorted(present, values), -1)
+                labels = np.asarray(labels).astype(object)
+                if entry['name'] in categorical:
+                    values = _sorted_categorical(values, labels)
+                else:
+                    decoded = labels[values] if len(labels) else np.empty(len(values), dtype=object)
+                    decoded[values < 0] = np.nan
+                    values = decoded
+            data[entry['name']] = values
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Discarding unreadable sidecar for log {uploaded_log.id}: {e}")
+        return None
+
+    return pd.DataFrame(data, copy=False)
+
+
+def _sorted_categorical(codes, labels):
+    """Categorical with sorted categories, so grouping order matches object columns"""
+    order = np.argsort(labels.astype(str), kind='stable')
+    remap = np.empty(len(order) + 1, dtype=np.int32)
+    remap[order] = np.arange(len(order), dtype=np.int32)
+    remap[-1] = -1  # missing cells keep code -1
+    return pd.Categorical.from_codes(remap[codes], labels[order])
+
+
+def read_timestamp_index(uploaded_log):
+    """Memory-mapped (sorted ns, rows) index of a log, or None if not built"""
+    if read_manifest(uploaded_log) is None:
+        return None
+    base = sidecar_path(uploaded_log)
+    try:
+        ns = np.load(os.path.join(base, INDEX_NS_NAME), mmap_mode='r')
+        rows = np.load(os.path.join(base, INDEX_ROWS_NAME), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if len(ns) != len(rows):
+        return None
+    return ns, rows
+
+
+def write_timestamp_index(uploaded_log, ns, rows):
+    """Store the index inside the sidecar, so rebuilding the sidecar drops it"""
+    base = sidecar_path(uploaded_log)
+    for name, values in ((INDEX_ROWS_NAME, rows), (INDEX_NS_NAME, ns)):
+        fd, partial = tempfile.mkstemp(dir=base, suffix='.npy.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.ascontiguousarray(values))
+            os.replace(partial, os.path.join(base, name))
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+
+
+def remove_sidecar(uploaded_log):
+    shutil.rmtree(sidecar_path(uploaded_log), ignore_errors=True)
@@ -0,0 +1,454 @@
+"""
+Constant-memory, mergeable analysis of logs read in chunks or segments.
+
+Each message type keeps a running count / sum / M2 / min / max (combined
+per chunk with Chan's parallel formula), a fixed-edge histogram, a
+quantile sketch and its first/last timestamp. Intervals that straddle a chunk or segment boundary
+are still counted, peak memory depends on the chunk size rather than the
+capture length, and two accumulators can be merged without revisiting
+any rows.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from .analysis import (
+    DAY_NS, MAX_LISTED_GAPS, NS_PER_SECOND, find_gaps, format_clock, gap_summary, infer_period, parse_timestamps,
+    unroll_midnight,
+)
+from .compression import log_format, open_log
+from .sketches import QuantileSketch
+
+CSV_CHUNK_ROWS = 100_000
+
+# Fixed log-spaced interval bins, 1 µs .. 100 s at 20 bins per decade.
+# Bin 0 collects anything shorter, the last bin anything longer.
+HISTOGRAM_EDGES = np.logspace(-6, 2, 161)
+
+STATE_VERSION = 3
+
+# Intervals a group buffers before its nominal period is inferred
+GAP_WARMUP_INTERVALS = 1024
+
+
+class IntervalStats:
+    """Mergeable running statistics of one group's intervals (seconds)"""
+
+    __slots__ = ('count', 'total', 'm2', 'minimum', 'maximum', 'histogram', 'sketch')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.histogram = np.zeros(len(HISTOGRAM_EDGES) + 1, dtype=np.int64)
+        self.sketch = QuantileSketch()
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def update(self, intervals):
+        """Fold a batch of intervals in with one vectorized pass"""
+        n = len(intervals)
+        if n == 0:
+            return
+        batch_mean = float(np.mean(intervals))
+        self._combine(n, batch_mean * n, float(np.var(intervals)) * n)
+        self.minimum = min(self.minimum, float(np.min(intervals)))
+        self.maximum = max(self.maximum, float(np.max(intervals)))
+        bins = np.searchsorted(HISTOGRAM_EDGES, intervals, side='right')
+        self.histogram += np.bincount(bins, minlength=len(self.histogram))
+        self.sketch.update(intervals)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        self._combine(other.count, other.total, other.m2)
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.histogram += other.histogram
+        self.sketch.merge(other.sketch)
+
+    def _combine(self, n, total, m2):
+        if self.count == 0:
+            self.count, self.total, self.m2 = n, total, m2
+            return
+        delta = total / n - self.mean
+        combined = self.count + n
+        self.m2 += m2 + delta * delta * self.count * n / combined
+        self.total += total
+        self.count = combined
+
+    def summary(self):
+        """Same keys and rounding as the in-memory analysis"""
+        if self.count == 0:
+            return {
+                "average_periodicity": 0,
+                "min_periodicity": 0,
+                "max_periodicity": 0,
+                "jitter_std_dev": 0,
+                **self.sketch.summary(),
+            }
+        return {
+            "average_periodicity": round(self.mean, 6),
+            "min_periodicity": round(self.minimum, 6),
+            "max_periodicity": round(self.maximum, 6),
+            "jitter_std_dev": round(self.std, 6),
+            **self.sketch.summary(self.minimum, self.maximum),
+        }
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'm2': self.m2,
+            'min': self.minimum if self.count else None,
+            'max': self.maximum if self.count else None,
+            'histogram': self.histogram.tolist(),
+            'sketch': self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data['count']
+        stats.total = data['sum']
+        stats.m2 = data['m2']
+        if stats.count:
+            stats.minimum = data['min']
+            stats.maximum = data['max']
+        stats.histogram = np.asarray(data['histogram'], dtype=np.int64)
+        stats.sketch = QuantileSketch.from_dict(data['sketch'])
+        return stats
+
+
+class GapDetector:
+    """
+    Streaming counterpart of analysis.detect_gaps. A group without a
+    supplied period infers it from the median of its first
+    GAP_WARMUP_INTERVALS intervals, which are held back until then; after
+    that each batch is one vectorized comparison and only the first
+    `limit` gaps per group are kept.
+    """
+
+    def __init__(self, multiple, periods=None, limit=MAX_LISTED_GAPS):
+        self.multiple = multiple
+        self.periods = periods or {}
+        self.limit = limit
+        self.groups = {}
+
+    def update(self, key, ns, continued):
+        """
+        Consume one batch of a group's timestamps. With `continued` the
+        batch starts with the group's last timestamp of the previous batch.
+        """
+        state = self.groups.get(key)
+        if state is None:
+            period = self.periods.get(key, self.periods.get('*'))
+            state = self.groups[key] = {
+                'nominal': period, 'source': 'inferred' if period is None else 'supplied',
+                'first_ns': int(ns[0]), 'messages': 0, 'pending': [], 'pending_count': 0,
+                'count': 0, 'late': 0, 'missed': 0, 'listed': ([], [], [], [], []),
+            }
+        base = state['messages'] - 1 if continued else state['messages']
+        state['messages'] = base + len(ns)
+        if len(ns) < 2:
+            return
+
+        batch = (base, ns)
+        if state['nominal'] is None:
+            state['pending'].append(batch)
+            state['pending_count'] += len(ns) - 1
+            if state['pending_count'] < GAP_WARMUP_INTERVALS:
+                return
+            self._settle(state)
+        else:
+            self._scan(state, batch)
+
+    def _settle(self, state):
+        """Infer the period from the buffered intervals, then scan them"""
+        pending, state['pending'] = state['pending'], []
+        steps = np.concatenate([np.diff(ns) for _, ns in pending]) / NS_PER_SECOND
+        state['nominal'] = infer_period(steps)
+        if state['nominal']:
+            for batch in pending:
+                self._scan(state, batch)
+
+    def _scan(self, state, batch):
+        base, ns = batch
+        steps = np.diff(ns) / NS_PER_SECOND
+        late, missed = find_gaps(steps, state['nominal'], self.multiple)
+        state['count'] += len(late)
+        state['late'] += len(late) - int(np.count_nonzero(missed))
+        state['missed'] += int(missed.sum())
+
+        room = self.limit - len(state['listed'][0])
+        if room > 0 and len(late):
+            shown = late[:room]
+            positions, times, durations, counts, timestamps = state['listed']
+            positions.extend((base + shown + 1).tolist())
+            times.extend(((ns[shown] - state['first_ns']) / NS_PER_SECOND).tolist())
+            durations.extend(steps[shown].tolist())
+            counts.extend(missed[:room].tolist())
+            timestamps.extend(format_clock(value) for value in ns[shown])
+
+    def summary(self, key):
+        state = self.groups.get(key)
+        if state is None:
+            return None
+        if state['pending']:
+            # Groups shorter than the warm-up use all of their intervals
+            self._settle(state)
+        if not state['nominal']:
+            return None
+        return gap_summary(
+            state['nominal'], state['source'], self.multiple,
+            state['count'], state['late'], state['missed'], state['listed'],
+        )
+
+
+class StreamingAnalyzer:
+    """
+    Feed (timestamp, message_type) chunks in file order. State carried
+    between chunks is one IntervalStats plus first/last timestamp per group.
+    An optional GapDetector sees every group's timestamps as they stream
+    by; it is not part of the persisted state, so merged segments do not
+    report gaps.
+    """
+
+    def __init__(self, gaps=None):
+        self.gaps = gaps
+        self.groups = {}
+        self.first_seen = {}
+        self.last_seen = {}
+        self.rows = 0
+        self.skipped_rows = 0
+        self.chunks = 0
+        self._last_ns = None
+
+    def feed(self, timestamps, message_types):
+        """Consume raw timestamp strings"""
+        parsed = parse_timestamps(np.asarray(timestamps, dtype=object))
+        usable = parsed.valid & ~parsed.missing
+        self.skipped_rows += int(np.count_nonzero(~usable & ~parsed.missing))
+        keys = pd.Series(message_types, copy=False)[usable].reset_index(drop=True)
+        self.feed_ns(parsed.ns[usable], keys, rows=len(timestamps))
+
+    def feed_ns(self, ns, message_types, rows=None):
+        """Consume timestamps already parsed to nanoseconds since midnight"""
+        self.chunks += 1
+        self.rows += len(ns) if rows is None else rows
+        if len(ns) == 0:
+            return
+
+        ns = self._continue_clock(unroll_midnight(np.asarray(ns, dtype=np.int64)))
+        keys = pd.Series(message_types, copy=False).reset_index(drop=True)
+
+        for key, positions in keys.groupby(keys, observed=True).indices.items():
+            # Keys are kept as text so segments parsed by different readers
+            # (and JSON round trips of the state) agree on group names
+            key = str(key)
+            group_ns = ns[positions]
+            previous = self.last_seen.get(key)
+            if previous is None:
+                self.first_seen[key] = int(group_ns[0])
+            else:
+                group_ns = np.concatenate(([previous], group_ns))
+            self.last_seen[key] = int(group_ns[-1])
+            if self.gaps is not None:
+                self.gaps.update(key, group_ns, continued=previous is not None)
+
+            intervals = np.diff(group_ns) / NS_PER_SECOND
+            intervals = intervals[intervals != 0]  # Remove zero intervals
+            self.groups.setdefault(key, IntervalStats()).update(intervals)
+
+    def _continue_clock(self, ns):
+        """Place a chunk's clock after the previous chunk across midnight"""
+        if self._last_ns is not None:
+            ns = ns + self._clock_offset(int(ns[0]))
+        self._last_ns = int(ns[-1])
+        return ns
+
+    def _clock_offset(self, first_ns):
+        offset = (self._last_ns // DAY_NS) * DAY_NS
+        if first_ns + offset < self._last_ns - DAY_NS // 2:
+            offset += DAY_NS
+        return offset
+
+    def merge(self, other):
+        """
+        Append a later segment analysed on its own. Only the boundary
+        interval between the two segments needs to be added per group.
+        """
+        if other._last_ns is None:
+            self.rows += other.rows
+            self.skipped_rows += other.skipped_rows
+            return
+
+        offset = 0
+        if self._last_ns is not None:
+            first = min(other.first_seen.values()) if other.first_seen else other._last_ns
+            offset = self._clock_offset(first)
+
+        for key, stats in other.groups.items():
+            first = other.first_seen[key] + offset
+            previous = self.last_seen.get(key)
+            mine = self.groups.setdefault(key, IntervalStats())
+            if previous is None:
+                self.first_seen[key] = first
+            elif first != previous:
+                mine.update(np.array([(first - previous) / NS_PER_SECOND]))
+            mine.merge(stats)
+            self.last_seen[key] = other.last_seen[key] + offset
+
+        self.rows += other.rows
+        self.skipped_rows += other.skipped_rows
+        self.chunks += other.chunks
+        self._last_ns = other._last_ns + offset
+
+    def result(self):
+        result = {
+            key: {
+                **self.groups[key].summary(),
+                "periodicity_plot": None,
+                "jitter_histogram": None,
+            }
+            for key in sorted(self.groups)
+        }
+        if self.gaps is not None:
+            for key, entry in result.items():
+                entry["gaps"] = self.gaps.summary(key)
+        return result
+
+    def to_state(self):
+        """JSON-serialisable snapshot (keys kept as values, not dict keys)"""
+        return {
+            'version': STATE_VERSION,
+            'rows': self.rows,
+            'skipped_rows': self.skipped_rows,
+            'chunks': self.chunks,
+            'last_ns': self._last_ns,
+            'groups': [
+                {
+                    'key': key,
+                    'first_ns': self.first_seen[key],
+                    'last_ns': self.last_seen[key],
+                    'stats': stats.to_dict(),
+                }
+                for key, stats in self.groups.items()
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        analyzer = cls()
+        if not state or state.get('version') != STATE_VERSION:
+            return None
+        analyzer.rows = state['rows']
+        analyzer.skipped_rows = state['skipped_rows']
+        analyzer.chunks = state['chunks']
+        analyzer._last_ns = state['last_ns']
+        for entry in state['groups']:
+            key = entry['key']
+            analyzer.first_seen[key] = entry['first_ns']
+            analyzer.last_seen[key] = entry['last_ns']
+            analyzer.groups[key] = IntervalStats.from_dict(entry['stats'])
+        return analyzer
+
+
+def _timestamp_column(columns):
+    for name in ('timestamp', 'Timestamp'):
+        if name in columns:
+            return name
+    raise Exception("Required column 'timestamp' or 'Timestamp' not found in file.")
+
+
+def stream_csv(source, chunk_rows=CSV_CHUNK_ROWS, analyzer=None):
+    """
+    Feed a CSV of any length into an analyzer, reading only the timestamp
+    and message_type columns `chunk_rows` at a time. Paths to compressed
+    logs are decompressed on the fly.
+    """
+    if not hasattr(source, 'read'):
+        # Performance: The header costs one decompressed block, not a seek
+        # (which compressed streams would pay for by inflating again)
+        with open_log(source) as stream:
+            columns = list(pd.read_csv(stream, nrows=0).columns)
+        with open_log(source) as stream:
+            return _feed_csv(stream, columns, chunk_rows, analyzer)
+
+    columns = list(pd.read_csv(source, nrows=0).columns)
+    source.seek(0)
+    return _feed_csv(source, columns, chunk_rows, analyzer)
+
+
+def _feed_csv(stream, columns, chunk_rows, analyzer):
+    analyzer = analyzer or StreamingAnalyzer()
+    timestamp_col = _timestamp_column(columns)
+    if 'message_type' not in columns:
+        raise Exception("Required column 'message_type' not found in file.")
+
+    reader = pd.read_csv(
+        stream,
+        usecols=[timestamp_col, 'message_type'],
+        dtype=str,
+        chunksize=chunk_rows,
+    )
+    for chunk in reader:
+        analyzer.feed(
+            chunk[timestamp_col].fillna(0).to_numpy(dtype=object),
+            chunk['message_type'].fillna(0).to_numpy(dtype=object),
+        )
+    return analyzer, columns
+
+
+def analyze_csv_stream(source, chunk_rows=CSV_CHUNK_ROWS, gaps=None):
+    """
+    Constant-memory analysis of a CSV. Returns (analysis, columns, stats).
+    `gaps` is a GapDetector to run alongside the statistics.
+    """
+    analyzer, columns = stream_csv(source, chunk_rows, StreamingAnalyzer(gaps=gaps))
+    return analyzer.result(), columns, {
+        'engine': 'chunked',
+        'rows': analyzer.rows,
+        'chunks': analyzer.chunks,
+        'skipped_rows': analyzer.skipped_rows,
+    }
+
+
+def accumulate_file(path):
+    """
+    Build a StreamingAnalyzer for one log file of any supported format.
+    CSV and MIL captures are streamed; spreadsheets are read whole.
+    """
+    from .evaluation import parse_excel
+    from .parsers import decode_mil, iter_mil_chunks
+
+    ext = log_format(path)[0]
+    if ext == '.csv':
+        return stream_csv(path)[0]
+
+    analyzer = StreamingAnalyzer()
+    if ext == '.mil':
+        with open_log(path) as f:
+            for records in iter_mil_chunks(f):
+                frame = decode_mil(records)
+                analyzer.feed_ns(frame['timestamp_ns'].to_numpy(), frame['message_type'])
+        return analyzer
+
+    df = parse_excel(path, usecols=lambda name: name in ('timestamp', 'Timestamp', 'message_type'))
+    if df is None:
+        raise ValueError("Invalid log file format or missing required columns.")
+    timestamp_col = _timestamp_column(df.columns)
+    analyzer.feed(
+        df[timestamp_col].fillna(0).to_numpy(dtype=object),
+        df['message_type'].fillna(0).to_numpy(dtype=object),
+    )
+    return analyzer
@@ -0,0 +1,126 @@
+"""
+Persistent per-group analysis summaries (AnalysisSummary rows).
+
+A log is summarised once, on its first evaluation: one pass over its
+compact message_type/rt_address frame yields every group's statistics
+and exact percentiles, written with a single bulk insert. Logs sharing
+content copy the rows of an already summarised twin instead. Each log's
+summary_state records whether its rows were written or the summary
+failed, so failures can be listed and retried.
+"""
+import logging
+
+from .analysis import group_codes, grouped_intervals, grouped_percentiles, timestamps_from_frame
+from .models import AnalysisSummary, UploadedLog
+from .sketches import REPORTED_QUANTILES
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_KEYS = ['message_type', 'rt_address']
+# Metric columns, in the same terms as the analysis response
+SUMMARY_METRICS = (
+    'intervals', 'average_periodicity', 'min_periodicity', 'max_periodicity', 'jitter_std_dev',
+    *(key for _, key in REPORTED_QUANTILES),
+)
+
+
+def summarize_frame(df):
+    """
+    Summary fields of every message type and every (message_type,
+    rt_address) pair of a frame. Groups are computed vectorized, one
+    grouping at a time; rows with unparsable timestamps are left out.
+    """
+    if 'message_type' not in df.columns:
+        return []
+    _, parsed = timestamps_from_frame(df)
+    usable = parsed.valid & ~parsed.missing
+    groupings = [['message_type']]
+    if 'rt_address' in df.columns:
+        groupings.append(SUMMARY_KEYS)
+
+    rows = []
+    for keys in groupings:
+        codes, key_values = group_codes(df, keys)
+        keep = usable & (codes >= 0)
+        n_groups = len(key_values)
+        grouped = grouped_intervals(codes[keep], parsed.ns[keep], n_groups)
+        percentiles = grouped_percentiles(grouped.intervals, grouped.interval_bounds, [q for q, _ in REPORTED_QUANTILES])
+
+        for code, values in enumerate(key_values):
+            filled = grouped.count[code] > 0
+            row = {
+                'message_type': str(values[0]),
+                'rt_address': str(values[1]) if len(values) > 1 else '',
+                'intervals': int(grouped.count[code]),
+                'average_periodicity': float(grouped.mean[code]) if filled else None,
+                'min_periodicity': float(grouped.minimum[code]) if filled else None,
+                'max_periodicity': float(grouped.maximum[code]) if filled else None,
+                'jitter_std_dev': float(grouped.std[code]) if filled else None,
+            }
+            for (_, key), value in zip(REPORTED_QUANTILES, percentiles[code]):
+                row[key] = float(value) if filled else None
+            rows.append(row)
+    return rows
+
+
+def record_summary_state(uploaded_log, state):
+    """Store a log's summary_state, skipping the write when it is unchanged"""
+    if uploaded_log.summary_state == state:
+        return
+    uploaded_log.summary_state = state
+    # Performance: A queryset update (no pre_save signal, no file access)
+    UploadedLog.objects.filter(pk=uploaded_log.pk).update(summary_state=state)
+
+
+def copy_twin_summaries(uploaded_log):
+    """
+    Give a log the summary rows of a log sharing its content, if one has
+    them. Returns whether rows were copied.
+    """
+    if not uploaded_log.blob_id:
+        return False
+    twin = AnalysisSummary.objects.filter(
+        log__blob_id=uploaded_log.blob_id
+    ).exclude(log=uploaded_log).values_list('log_id', flat=True).first()
+    if twin is None:
+        return False
+    fields = ['message_type', 'rt_address', *SUMMARY_METRICS]
+    rows = AnalysisSummary.objects.filter(log_id=twin).values(*fields)
+    AnalysisSummary.objects.bulk_create(
+        [AnalysisSummary(log=uploaded_log, **row) for row in rows],
+        ignore_conflicts=True,
+    )
+    record_summary_state(uploaded_log, UploadedLog.SUMMARY_DONE)
+    return True
+
+
+def summarize_log(uploaded_log, reuse_twin=True):
+    """
+    Write the log's summary rows unless it already has them. With
+    `reuse_twin` false they are computed even when a log sharing the
+    content has rows (which may predate an analysis change). A log that
+    cannot be summarised is marked SUMMARY_FAILED (errors are re-raised).
+    """
+    from .evaluation import load_compact_frame
+
+    if AnalysisSummary.objects.filter(log=uploaded_log).exists():
+        record_summary_state(uploaded_log, UploadedLog.SUMMARY_DONE)
+        return False
+    if reuse_twin and copy_twin_summaries(uploaded_log):
+        return True
+
+    try:
+        # Performance: Only the timestamp and the two key columns are loaded
+        df, _ = load_compact_frame(uploaded_log, {'group_by': SUMMARY_KEYS})
+        if df is None:
+            record_summary_state(uploaded_log, UploadedLog.SUMMARY_FAILED)
+            return False
+        AnalysisSummary.objects.bulk_create(
+            [AnalysisSummary(log=uploaded_log, **row) for row in summarize_frame(df)],
+            ignore_conflicts=True,
+        )
+    except Exception:
+        record_summary_state(uploaded_log, UploadedLog.SUMMARY_FAILED)
+        raise
+    record_summary_state(uploaded_log, UploadedLog.SUMMARY_DONE)
+    return True
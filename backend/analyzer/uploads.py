@@ -0,0 +1,253 @@
+"""
+Chunked, resumable uploads.
+
+A client opens an UploadSession, PUTs numbered chunks (in any order, any
+number of times) and completes the session. The chunks are then assembled
+by the analysis worker, so multi-GB captures never run into the request
+timeout. Chunk bodies are streamed from the request to disk and hashed on
+the way, so neither chunks nor the assembled capture are ever held in
+memory.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .blobs import blob_staging_dir, blob_staging_file, store_log
+from .compression import UnsupportedArchive, check_log_format
+from .models import UploadChunk, UploadSession
+
+STREAM_BLOCK_BYTES = 1024 * 1024
+
+
+class UploadError(Exception):
+    """A chunk or session request that cannot be honoured"""
+
+
+class UploadConflict(UploadError):
+    """The session is not in a state that allows the request"""
+
+
+def session_dir(session):
+    return os.path.join(settings.MEDIA_ROOT, 'uploads', str(session.pk))
+
+
+def chunk_path(session, index):
+    return os.path.join(session_dir(session), f'{index:08d}.part')
+
+
+def open_session(user, filename, size, chunk_size=None, sha256=''):
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    if not 0 < chunk_size <= settings.UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError(f'chunk_size must be between 1 and {settings.UPLOAD_MAX_CHUNK_SIZE} bytes')
+    if not 0 < size <= settings.CHUNKED_UPLOAD_MAX_BYTES:
+        raise UploadError(f'size must be between 1 and {settings.CHUNKED_UPLOAD_MAX_BYTES} bytes')
+
+    session = UploadSession.objects.create(
+        user=user,
+        filename=os.path.basename(filename),
+        size=size,
+        chunk_size=chunk_size,
+        sha256=sha256.lower(),
+    )
+    os.makedirs(session_dir(session), exist_ok=True)
+    return session
+
+
+def write_chunk(session, index, stream, expected_sha256=None):
+    """
+    Stream one chunk body to disk, hashing it as it is written. A chunk
+    sent again (e.g. after a dropped connection) replaces the earlier copy.
+    """
+    if session.status != UploadSession.STATUS_OPEN:
+        raise UploadConflict(f'Upload is {session.status}')
+    if not 0 <= index < session.total_chunks:
+        raise UploadError(f'Chunk index must be between 0 and {session.total_chunks - 1}')
+
+    expected_size = session.expected_chunk_size(index)
+    directory = session_dir(session)
+    os.makedirs(directory, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, partial = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                block = stream.read(STREAM_BLOCK_BYTES)
+                if not block:
+                    break
+                size += len(block)
+                if size > expected_size:
+                    raise UploadError(f'Chunk {index} is larger than {expected_size} bytes')
+                digest.update(block)
+                out.write(block)
+
+        if size != expected_size:
+            raise UploadError(f'Chunk {index} has {size} bytes, expected {expected_size}')
+        checksum = digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != checksum:
+            raise UploadError(f'Chunk {index} checksum mismatch')
+
+        os.replace(partial, chunk_path(session, index))
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+    chunk, _ = UploadChunk.objects.update_or_create(
+        session=session,
+        index=index,
+        defaults={'size': size, 'sha256': checksum},
+    )
+    UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+    return chunk
+
+
+def missing_chunks(session):
+    received = set(session.chunks.values_list('index', flat=True))
+    return [index for index in range(session.total_chunks) if index not in received]
+
+
+def claim_session(session):
+    """
+    Move an open session whose chunks have all arrived to assembling. The
+    assembly itself runs in the analysis worker (assemble_session).
+    """
+    if session.status != UploadSession.STATUS_OPEN:
+        raise UploadConflict(f'Upload is {session.status}')
+    missing = missing_chunks(session)
+    if missing:
+        raise UploadError(f'Missing chunks: {", ".join(map(str, missing[:20]))}')
+
+    # Performance: Conditional UPDATE instead of a lock held while assembling
+    claimed = UploadSession.objects.filter(
+        pk=session.pk, status=UploadSession.STATUS_OPEN
+    ).update(status=UploadSession.STATUS_ASSEMBLING, updated_at=timezone.now())
+    if not claimed:
+        session.refresh_from_db()
+        raise UploadConflict(f'Upload is {session.status}')
+    session.status = UploadSession.STATUS_ASSEMBLING
+
+
+def assemble_session(session, allowed_extensions=None):
+    """
+    Concatenate the chunks of a claimed session into a new UploadedLog,
+    computing the SHA-256 of the whole file in the same pass. A failed
+    assembly reopens the session. Returns (uploaded_log, deduplicated).
+    """
+    # Also restarts the stalled-assembly clock for a job that waited in the queue
+    started = UploadSession.objects.filter(
+        pk=session.pk, status=UploadSession.STATUS_ASSEMBLING
+    ).update(updated_at=timezone.now())
+    if not started:
+        session.refresh_from_db()
+        raise UploadConflict(f'Upload is {session.status}')
+
+    try:
+        missing = missing_chunks(session)
+        if missing:
+            raise UploadError(f'Missing chunks: {", ".join(map(str, missing[:20]))}')
+
+        digest = hashlib.sha256()
+        out, staged = blob_staging_file()
+        try:
+            with out:
+                for index in range(session.total_chunks):
+                    with open(chunk_path(session, index), 'rb') as part:
+                        for block in iter(lambda: part.read(STREAM_BLOCK_BYTES), b''):
+                            digest.update(block)
+                            out.write(block)
+            checksum = digest.hexdigest()
+            if session.sha256 and session.sha256 != checksum:
+                raise UploadError('File checksum mismatch')
+            if allowed_extensions is not None:
+                try:
+                    check_log_format(session.filename, allowed_extensions, source=staged)
+                except UnsupportedArchive as e:
+                    raise UploadError(str(e))
+
+            with transaction.atomic():
+                # Performance: The staged file is renamed into the blob store
+                # (or dropped if that content is already stored)
+                uploaded_log, deduplicated = store_log(
+                    session.user, session.filename, sha256=checksum, path=staged
+                )
+                session.status = UploadSession.STATUS_COMPLETE
+                session.log = uploaded_log
+                session.save(update_fields=['status', 'log', 'updated_at'])
+        except BaseException:
+            if os.path.exists(staged):
+                os.remove(staged)
+            raise
+    except BaseException:
+        UploadSession.objects.filter(pk=session.pk).update(status=UploadSession.STATUS_OPEN)
+        session.status = UploadSession.STATUS_OPEN
+        raise
+
+    shutil.rmtree(session_dir(session), ignore_errors=True)
+    session.chunks.all().delete()
+    return uploaded_log, deduplicated
+
+
+def upload_result(session, uploaded_log, deduplicated):
+    """What a completed upload reports about its new log"""
+    return {
+        'file_id': uploaded_log.id,
+        'filename': uploaded_log.original_name,
+        'uploaded_at': uploaded_log.uploaded_at.isoformat(),
+        'size': session.size,
+        'sha256': uploaded_log.sha256,
+        'deduplicated': deduplicated,
+    }
+
+
+def abort_session(session):
+    if session.status == UploadSession.STATUS_ASSEMBLING:
+        raise UploadConflict('Upload is being assembled')
+    shutil.rmtree(session_dir(session), ignore_errors=True)
+    session.delete()
+
+
+def purge_stale_sessions(max_age=None):
+    """Delete open sessions (and their chunks) idle for longer than max_age"""
+    max_age = max_age or timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    stale = UploadSession.objects.filter(
+        status=UploadSession.STATUS_OPEN,
+        updated_at__lt=timezone.now() - max_age,
+    )
+    count = 0
+    for session in stale.iterator():
+        shutil.rmtree(session_dir(session), ignore_errors=True)
+        session.delete()
+        count += 1
+    return count
+
+
+def recover_stalled_sessions(timeout=None):
+    """
+    Reopen sessions stuck in assembling for longer than `timeout` (the
+    process assembling them died), so they can be completed again or
+    purged once idle. Staged files left behind by such crashes are removed.
+    """
+    timeout = timeout or timedelta(seconds=settings.UPLOAD_ASSEMBLY_TIMEOUT)
+    recovered = UploadSession.objects.filter(
+        status=UploadSession.STATUS_ASSEMBLING,
+        updated_at__lt=timezone.now() - timeout,
+    ).update(status=UploadSession.STATUS_OPEN, updated_at=timezone.now())
+
+    directory = blob_staging_dir()
+    cutoff = time.time() - timeout.total_seconds()
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+    return recovered
@@ -1,18 +1,30 @@
 from django.urls import path
 from .views import RegisterView, FileUploadView, home, CurrentUserView, login_view, logout_view, change_password_view
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import BMDataEvaluationView, health_check, list_files
+from .views import UploadChunkView, UploadSessionDetailView, UploadSessionView, complete_upload
+from .views import AnalysisSummaryView, BatchEvaluationView, BMDataEvaluationView, FleetStatisticsView, LogComparisonView, LogRowsView, LogSegmentsView, health_check, job_status, list_files
 
 urlpatterns = [
     path('', home),
     path('register/', RegisterView.as_view(), name='register'),
     path('upload/', FileUploadView.as_view(), name='file-upload'),
+    path('uploads/', UploadSessionView.as_view(), name='upload-sessions'),
+    path('uploads/<uuid:upload_id>/', UploadSessionDetailView.as_view(), name='upload-session'),
+    path('uploads/<uuid:upload_id>/chunks/<int:index>/', UploadChunkView.as_view(), name='upload-chunk'),
+    path('uploads/<uuid:upload_id>/complete/', complete_upload, name='upload-complete'),
     path('current-user/', CurrentUserView.as_view(), name='current-user'),
     path('login/', login_view, name='login'),  # Primary login endpoint
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', logout_view, name='logout'),
     path('change-password/', change_password_view, name='change-password'),
+    path('evaluate/batch/', BatchEvaluationView.as_view(), name='bm-evaluate-batch'),
+    path('evaluate/compare/', LogComparisonView.as_view(), name='bm-evaluate-compare'),
+    path('evaluate/fleet/', FleetStatisticsView.as_view(), name='bm-evaluate-fleet'),
+    path('evaluate/summaries/', AnalysisSummaryView.as_view(), name='bm-evaluate-summaries'),
     path('evaluate/<int:file_id>/', BMDataEvaluationView.as_view(), name='bm-evaluate'),
     path('health/', health_check, name='health-check'),
     path('files/', list_files, name='list-files'),
+    path('files/<int:file_id>/rows/', LogRowsView.as_view(), name='log-rows'),
+    path('files/<int:file_id>/segments/', LogSegmentsView.as_view(), name='log-segments'),
+    path('jobs/<int:job_id>/', job_status, name='analysis-job'),
 ]
@@ -5,24 +5,45 @@ from rest_framework import status, permissions
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
-from django.http import JsonResponse
+from rest_framework.exceptions import ValidationError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Q
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
+import base64
+import binascii
+import math
 import os
+import time
+from datetime import datetime
 import pandas as pd
 import numpy as np
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import io
-import base64
-from datetime import datetime
-import math
 
-from .models import UploadedLog
+from .analysis import DEFAULT_GAP_MULTIPLE, DOWNSAMPLERS, parse_rolling_window
+from .authentication import tokens_for_user
+from .batch import evaluate_many
+from .blobs import HashingUploadHandler, record_log_metadata, store_log
+from .comparison import compare_logs
+from .compression import UnsupportedArchive, check_log_format, open_log, split_wrapper
+from .evaluation import (
+    ANALYSIS_ENGINES, DEFAULT_GROUP_BY, DEFAULT_SERIES_POINTS, MAX_SERIES_POINTS, PLOT_MODES,
+    InvalidLogError, evaluate_log, open_log_rows, parse_excel,
+)
+from .jobs import enqueue_assembly, enqueue_evaluation, job_payload
+from .models import AnalysisJob, AnalysisSummary, UploadedLog, UploadSession
+from .parsers import parse_mil, read_mil
+from .segments import SEGMENT_EXTENSIONS, append_segment, fleet_statistics, log_statistics, statistics_payload
+from .selection import FILTER_COLUMNS, parse_clock
 from .serializers import UploadedLogSerializer, UserSerializer
+from .summaries import SUMMARY_METRICS
+from .uploads import (
+    UploadConflict, UploadError, abort_session, claim_session, missing_chunks,
+    open_session, write_chunk,
+)
 
 User = get_user_model()
 
@@ -38,6 +59,42 @@ class FileUploadThrottle(UserRateThrottle):
     rate = '10/hour'
 
 
+ALLOWED_UPLOAD_EXTENSIONS = ['.csv', '.txt', '.json', '.xlsx', '.mil']
+
+
+def _query_flag(request, name):
+    """Interpret ?name=1/true/yes as a boolean switch"""
+    return str(request.query_params.get(name, '')).lower() in ('1', 'true', 'yes')
+
+
+def _request_param(request, name, default=None):
+    """Read an option from the query string, falling back to the request body"""
+    value = request.query_params.get(name)
+    if value is None and hasattr(request.data, 'get'):
+        value = request.data.get(name)
+    return default if value is None else value
+
+
+def _query_list(request, name):
+    """Collect ?name=a,b and repeated ?name=a&name=b values"""
+    values = []
+    for item in request.query_params.getlist(name):
+        values.extend(part.strip() for part in item.split(',') if part.strip())
+    return values
+
+
+def _matching_rows(series, values):
+    """Positions of the rows whose value, as a string, is one of `values`"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Performance: Compare each distinct value once, then select by code
+        codes = series.cat.codes.to_numpy()
+        mask = np.isin(codes, np.flatnonzero(series.cat.categories.astype(str).isin(values)))
+        if 'nan' in values:
+            mask |= codes < 0
+        return np.flatnonzero(mask)
+    return np.flatnonzero(series.astype(str).isin(values).to_numpy())
+
+
 def home(request):
     """Clean home endpoint with caching"""
     return JsonResponse({
@@ -126,8 +183,8 @@ def login_view(request):
     except Exception:
         pass  # Continue even if cache fails
     
-    # Generate JWT tokens
-    refresh = RefreshToken.for_user(user)
+    # Generate JWT tokens, carrying the user info requests are served from
+    refresh = tokens_for_user(user)
     
     return Response({
         'refresh': str(refresh),
@@ -173,12 +230,13 @@ class CurrentUserView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        # Performance: Every serialized field comes from the token claims, no query
         serializer = UserSerializer(request.user)
         return Response(serializer.data)
     
     def put(self, request):
         """Update user profile (full_name, email)"""
-        user = request.user
+        user = User.objects.get(pk=request.user.pk)
         
         # Only allow updating certain fields
         allowed_fields = ['full_name', 'email']
@@ -202,11 +260,15 @@ class CurrentUserView(APIView):
             setattr(user, field, value)
         
         try:
-            user.save()
+            user.save(update_fields=list(update_data))
             serializer = UserSerializer(user)
+            # Tokens with the new claims; the old ones show the old profile until refreshed
+            refresh = tokens_for_user(user)
             return Response({
                 'message': 'Profile updated successfully',
-                'user': serializer.data
+                'user': serializer.data,
+                'refresh': str(refresh),
+                'access': str(refresh.access_token),
             }, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({
@@ -218,7 +280,7 @@ class CurrentUserView(APIView):
 @permission_classes([IsAuthenticated])
 def change_password_view(request):
     """Change user password"""
-    user = request.user
+    user = User.objects.get(pk=request.user.pk)
     old_password = request.data.get('old_password')
     new_password = request.data.get('new_password')
     
@@ -242,9 +304,13 @@ def change_password_view(request):
     # Set new password
     try:
         user.set_password(new_password)
-        user.save()
+        user.save(update_fields=['password'])
+        # Tokens of the old password are revoked, this session gets new ones
+        refresh = tokens_for_user(user)
         return Response({
-            'message': 'Password changed successfully'
+            'message': 'Password changed successfully',
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
         }, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({
@@ -265,6 +331,10 @@ class FileUploadView(APIView):
     throttle_classes = [FileUploadThrottle]
 
     def post(self, request, format=None):
+        # Performance: Hash the file while Django receives it (no second read)
+        hasher = HashingUploadHandler(request)
+        request.upload_handlers.insert(0, hasher)
+
         # Performance: Early file validation
         if 'file' not in request.FILES:
             return Response({
@@ -280,14 +350,13 @@ class FileUploadView(APIView):
                 'error': f'File too large. Maximum size is {max_size // (1024*1024)}MB'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Performance: File type validation
-        allowed_extensions = ['.csv', '.txt', '.json', '.xlsx', '.mil']
-        file_ext = os.path.splitext(uploaded_file.name)[1].lower()
-        
-        if file_ext not in allowed_extensions:
-            return Response({
-                'error': f'Unsupported file type. Allowed: {", ".join(allowed_extensions)}'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # Performance: File type validation (compressed logs by their content type)
+        try:
+            file_ext, wrapper = check_log_format(
+                uploaded_file.name, ALLOWED_UPLOAD_EXTENSIONS, source=uploaded_file
+            )
+        except UnsupportedArchive as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Clean serializer processing
         serializer = UploadedLogSerializer(
@@ -299,12 +368,20 @@ class FileUploadView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Save file efficiently
-            uploaded_log = serializer.save()
-            file_path = uploaded_log.file.path
+            # Performance: Content-addressed storage, duplicates only add a reference
+            uploaded_log, deduplicated = store_log(
+                request.user,
+                uploaded_file.name,
+                sha256=hasher.digests.get('file'),
+                content=serializer.validated_data['file'],
+            )
             
             # Performance: Process file based on type
             response_data = self._process_file_efficiently(uploaded_log, file_ext)
+            if wrapper:
+                response_data['compression'] = wrapper.lstrip('.')
+            response_data['sha256'] = uploaded_log.sha256
+            response_data['deduplicated'] = deduplicated
             
             return Response(response_data, status=status.HTTP_201_CREATED)
             
@@ -319,7 +396,7 @@ class FileUploadView(APIView):
         base_response = {
             'message': '📁 File uploaded successfully',
             'file_id': uploaded_log.id,
-            'filename': uploaded_log.file.name,
+            'filename': uploaded_log.original_name or uploaded_log.file.name,
             'uploaded_at': uploaded_log.uploaded_at.isoformat(),
         }
         
@@ -328,7 +405,10 @@ class FileUploadView(APIView):
         try:
             if file_ext == '.csv':
                 # Performance: Read only first 1000 rows for preview
-                df = pd.read_csv(file_path, nrows=1000)
+                # (compressed logs inflate only as far as those rows)
+                with open_log(file_path) as stream:
+                    df = pd.read_csv(stream, nrows=1000)
+                self._record_preview_rows(uploaded_log, df)
                 base_response.update({
                     'parsedData': {
                         'columns': list(df.columns),
@@ -339,20 +419,54 @@ class FileUploadView(APIView):
                 
             elif file_ext in ['.txt', '.json']:
                 # Performance: Limit file size for JSON parsing
-                if os.path.getsize(file_path) > 1024 * 1024:  # 1MB limit for JSON
+                preview_limit = 1024 * 1024  # 1MB limit for JSON
+                with open_log(file_path) as stream:
+                    content = stream.read(preview_limit + 1)
+                if len(content) > preview_limit:
                     base_response['message'] += ' (Large file - use analysis endpoint)'
                 else:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        parsed_data = f.read()
-                        if file_ext == '.json':
-                            import json
-                            parsed_data = json.loads(parsed_data)
-                        base_response['parsedData'] = parsed_data
+                    parsed_data = content.decode('utf-8')
+                    if file_ext == '.json':
+                        import json
+                        parsed_data = json.loads(parsed_data)
+                    base_response['parsedData'] = parsed_data
                         
             elif file_ext == '.xlsx':
                 base_response['message'] = '📁 Excel file uploaded. Use /api/evaluate/{file_id}/ for analysis.'
+                # Performance: Streamed read that stops after the preview rows
+                df = parse_excel(file_path, max_rows=1000)
+                if df is not None:
+                    self._record_preview_rows(uploaded_log, df)
+                    base_response['parsedData'] = {
+                        'columns': list(df.columns),
+                        'rows': df.to_dict(orient='records'),
+                        'total_rows': len(df)
+                    }
                 
-            else:  # .mil or other
+            elif file_ext == '.mil':
+                # Performance: Decode only the first 1000 records (memory-mapped,
+                # or streamed from a compressed capture)
+                if split_wrapper(file_path)[1] is None:
+                    df = parse_mil(file_path, max_records=1000)
+                    if df is not None:
+                        # The record count follows from the file size
+                        record_log_metadata(uploaded_log, row_count=len(read_mil(file_path)))
+                else:
+                    with open_log(file_path) as stream:
+                        df = parse_mil(stream, max_records=1000)
+                if df is None:
+                    base_response['warning'] = 'File uploaded but it is not a valid MIL capture'
+                else:
+                    base_response.update({
+                        'message': '📁 MIL capture uploaded. Use /api/evaluate/{file_id}/ for analysis.',
+                        'parsedData': {
+                            'columns': list(df.columns),
+                            'rows': df.to_dict(orient='records'),
+                            'total_rows': len(df)
+                        }
+                    })
+                
+            else:  # other
                 base_response['message'] = '📁 File uploaded. Use appropriate analysis endpoint.'
                 
         except Exception as e:
@@ -360,7 +474,295 @@ class FileUploadView(APIView):
             
         return base_response
 
-class BMDataEvaluationView(APIView):
+    def _record_preview_rows(self, uploaded_log, df):
+        """A preview shorter than its limit covered the whole file"""
+        if len(df) < 1000:
+            record_log_metadata(uploaded_log, row_count=len(df))
+
+
+def _upload_payload(session):
+    missing = missing_chunks(session) if session.status == UploadSession.STATUS_OPEN else []
+    data = {
+        'upload_id': str(session.pk),
+        'filename': session.filename,
+        'size': session.size,
+        'chunk_size': session.chunk_size,
+        'total_chunks': session.total_chunks,
+        'status': session.status,
+        'missing_chunks': missing,
+        'file_id': session.log_id,
+        'upload_url': reverse('upload-session', args=[session.pk]),
+    }
+    job = session.assembly_jobs.order_by('-created_at').first()
+    if job is not None:
+        # The latest assembly: its error explains a session that is open again
+        data['job'] = job_payload(job)
+    return data
+
+
+class UploadSessionView(APIView):
+    """
+    Start a chunked upload for files above the single-request limit
+    - POST {filename, size, chunk_size?, sha256?}
+    - then PUT each chunk body to /api/uploads/<id>/chunks/<index>/
+    - then POST /api/uploads/<id>/complete/ and poll the upload (or its job)
+      until it is complete
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [FileUploadThrottle]
+
+    def post(self, request):
+        filename = str(request.data.get('filename', ''))
+        try:
+            # Zip members are checked once the archive is assembled
+            check_log_format(filename, ALLOWED_UPLOAD_EXTENSIONS)
+        except UnsupportedArchive as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            size = int(request.data.get('size'))
+            chunk_size = int(request.data.get('chunk_size') or 0) or None
+        except (TypeError, ValueError):
+            return Response({'error': 'size and chunk_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            session = open_session(
+                request.user, filename, size, chunk_size, str(request.data.get('sha256') or '')
+            )
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(_upload_payload(session), status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(APIView):
+    """GET: progress and missing chunks (to resume). DELETE: abort."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        try:
+            session = UploadSession.objects.get(pk=upload_id, user=request.user)
+        except UploadSession.DoesNotExist:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(_upload_payload(session), status=status.HTTP_200_OK)
+
+    def delete(self, request, upload_id):
+        try:
+            session = UploadSession.objects.get(pk=upload_id, user=request.user)
+            abort_session(session)
+        except UploadSession.DoesNotExist:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        except UploadConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadChunkView(APIView):
+    """
+    PUT the raw bytes of one chunk (application/octet-stream). The body is
+    streamed to disk, never parsed or buffered; an optional X-Chunk-SHA256
+    header is verified. Re-sending a chunk replaces it.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, upload_id, index):
+        try:
+            session = UploadSession.objects.get(pk=upload_id, user=request.user)
+        except UploadSession.DoesNotExist:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            # Performance: Read the body as a stream; request.data is never touched
+            chunk = write_chunk(session, index, request, request.META.get('HTTP_X_CHUNK_SHA256'))
+        except UploadConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'index': chunk.index,
+            'size': chunk.size,
+            'sha256': chunk.sha256,
+        }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def complete_upload(request, upload_id):
+    """
+    Queue the assembly of the received chunks into an uploaded log. The
+    upload reports assembling until the analysis worker is done; the job
+    then holds the new file_id.
+    """
+    try:
+        session = UploadSession.objects.get(pk=upload_id, user=request.user)
+    except UploadSession.DoesNotExist:
+        return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        with transaction.atomic():
+            claim_session(session)
+            job = enqueue_assembly(session, ALLOWED_UPLOAD_EXTENSIONS)
+    except UploadConflict as e:
+        return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+    except UploadError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'message': '📁 Upload received. Assembly is queued; poll upload_url or status_url for the file_id.',
+        'upload_id': str(session.pk),
+        'upload_url': reverse('upload-session', args=[session.pk]),
+        'status': session.status,
+        'job_id': job.id,
+        'status_url': reverse('analysis-job', args=[job.id]),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+class AnalysisParamsMixin:
+    """Parsing of the analysis options shared by the evaluation views"""
+    default_plots = 'png'
+
+    def _analysis_params(self, request):
+        """Request options that change the analysis output (part of the cache key)"""
+        params = {}
+
+        engine = str(_request_param(request, 'engine', 'frame')).lower()
+        if engine not in ANALYSIS_ENGINES:
+            raise ValidationError(f"engine must be one of: {', '.join(ANALYSIS_ENGINES)}")
+        group_by = self._group_by(request)
+        selection = self._selection(request)
+        rolling = self._rolling(request)
+        gaps = self._gaps(request)
+        if engine == 'chunked':
+            if group_by != DEFAULT_GROUP_BY:
+                raise ValidationError("group_by is not supported by the chunked engine")
+            if selection:
+                raise ValidationError("start/end/message_type/rt_address are not supported by the chunked engine")
+            if rolling:
+                raise ValidationError("rolling is not supported by the chunked engine")
+            # Statistics only: plots need every interval in memory
+            params['engine'] = engine
+            if gaps:
+                params['gaps'] = gaps
+            return params
+        if group_by != DEFAULT_GROUP_BY:
+            params['group_by'] = group_by
+        params.update(selection)
+        if gaps:
+            params['gaps'] = gaps
+
+        # Performance: Multi-key groupings can produce thousands of groups,
+        # so they skip the per-group PNGs unless plots are asked for
+        default_plots = self.default_plots if len(group_by) == 1 else 'none'
+        plots = str(_request_param(request, 'plots', default_plots)).lower()
+        if plots not in PLOT_MODES:
+            raise ValidationError(f"plots must be one of: {', '.join(PLOT_MODES)}")
+        if plots != 'png':
+            params['plots'] = plots
+
+        if plots == 'series':
+            downsample = str(_request_param(request, 'downsample', 'lttb')).lower()
+            if downsample not in DOWNSAMPLERS:
+                raise ValidationError(f"downsample must be one of: {', '.join(DOWNSAMPLERS)}")
+            params['downsample'] = downsample
+        if rolling:
+            params['rolling'] = rolling
+        if plots == 'series' or rolling:
+            try:
+                points = int(_request_param(request, 'points', DEFAULT_SERIES_POINTS))
+            except (TypeError, ValueError):
+                raise ValidationError("points must be an integer")
+            params['points'] = min(max(points, 3), MAX_SERIES_POINTS)
+
+        return params
+
+    def _gaps(self, request):
+        """
+        ?gaps=true (or a multiple of the nominal period, default 1.5) reports
+        late and missed messages. ?period=0.02 or ?period=data:0.02,status:0.1
+        supplies nominal periods per message type instead of inferring them.
+        """
+        value = _request_param(request, 'gaps')
+        if value in (None, '') or str(value).lower() in ('0', 'false', 'no', 'off'):
+            return None
+        if str(value).lower() in ('1', 'true', 'yes', 'on'):
+            multiple = DEFAULT_GAP_MULTIPLE
+        else:
+            try:
+                multiple = float(value)
+            except (TypeError, ValueError):
+                multiple = 0
+            if not multiple > 1 or math.isinf(multiple):
+                raise ValidationError("gaps must be true or a multiple of the nominal period greater than 1")
+
+        periods = {}
+        for item in self._list_param(request, 'period'):
+            key, _, seconds = item.rpartition(':')
+            try:
+                seconds = float(seconds)
+            except ValueError:
+                seconds = 0
+            if not seconds > 0 or math.isinf(seconds):
+                raise ValidationError("period must be seconds, or message_type:seconds pairs")
+            periods[key.strip() or '*'] = seconds
+        gaps = {'multiple': multiple}
+        if periods:
+            gaps['periods'] = periods
+        return gaps
+
+    def _rolling(self, request):
+        """?rolling=1s|250ms|2min (time window) or ?rolling=100 (messages)"""
+        value = _request_param(request, 'rolling')
+        if value in (None, ''):
+            return None
+        window = parse_rolling_window(value)
+        if window is None:
+            raise ValidationError("rolling must be a duration such as 1s, 250ms or 2min, or a message count of at least 2")
+        return window
+
+    def _list_param(self, request, name):
+        """?name=a,b (or a list in the body) as a list of strings"""
+        value = _request_param(request, name)
+        if value is None:
+            return []
+        if isinstance(value, (str, int)):
+            value = str(value).split(',')
+        try:
+            return [str(item).strip() for item in value if str(item).strip()]
+        except TypeError:
+            raise ValidationError(f"{name} must be a comma-separated list")
+
+    def _group_by(self, request):
+        """?group_by=rt_address,subaddress,message_type (or a list in the body)"""
+        group_by = self._list_param(request, 'group_by')
+        if not group_by:
+            return DEFAULT_GROUP_BY
+        if len(set(group_by)) != len(group_by):
+            raise ValidationError("group_by columns must be distinct")
+        return group_by
+
+    def _selection(self, request):
+        """
+        ?start=12:03:10&end=12:03:40 (clock times, the window may run past
+        midnight) and ?message_type=.../?rt_address=... restrict the rows
+        analysed. Times are normalised to ns so equal windows share a cache entry.
+        """
+        selection = {}
+        for name in ('start', 'end'):
+            value = _request_param(request, name)
+            if value in (None, ''):
+                continue
+            ns = parse_clock(value)
+            if ns is None:
+                raise ValidationError(f"{name} must be a time of day as HH:MM:SS[.ffffff]")
+            selection[name] = ns
+        for name in FILTER_COLUMNS:
+            values = self._list_param(request, name)
+            if values:
+                selection[name] = sorted(set(values))
+        return selection
+
+
+class BMDataEvaluationView(AnalysisParamsMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, file_id):
@@ -373,30 +775,27 @@ class BMDataEvaluationView(APIView):
     def _process_evaluation(self, request, file_id):
         try:
             uploaded_log = UploadedLog.objects.get(id=file_id, user=request.user)
-            file_path = uploaded_log.file.path
+            params = self._analysis_params(request)
 
-            df = self._parse_excel(file_path)
-            if df is None:
-                return Response({"error": "Invalid Excel file format or missing required columns."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Replace NaN values in the DataFrame with 0 before processing
-            df = df.fillna(0)
-            
-            analysis = self._analyze_data(df)
-            raw_data = {
-                'columns': list(df.columns),
-                'rows': df.to_dict(orient='records'),
-            }
-            
-            # Sanitize all data before returning
-            response_data = {
-                'analysis': analysis,
-                'rawData': raw_data,
-            }
-            sanitized_data = self._sanitize_data(response_data)
+            if self._wants_job(request):
+                job = enqueue_evaluation(uploaded_log, params)
+                return Response(job_payload(job), status=status.HTTP_202_ACCEPTED)
+
+            include_rows = _query_flag(request, 'include_rows')
+            if include_rows and any(name in params for name in ('start', 'end', *FILTER_COLUMNS)):
+                raise ValidationError("include_rows cannot be combined with a row selection; use /api/files/<id>/rows/")
+
+            try:
+                payload, cache_state = evaluate_log(uploaded_log, params, include_rows=include_rows)
+            except InvalidLogError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            return Response(sanitized_data, status=status.HTTP_200_OK)
+            response = Response(payload, status=status.HTTP_200_OK)
+            response['X-Analysis-Cache'] = cache_state
+            return response
     
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
         except UploadedLog.DoesNotExist:
             # Return mock data instead of 404 to prevent frontend errors
             return self._get_mock_evaluation_data(file_id)
@@ -406,6 +805,12 @@ class BMDataEvaluationView(APIView):
             logger.error(f"Evaluation error for file {file_id}: {str(e)}")
             return self._get_mock_evaluation_data(file_id)
     
+    def _wants_job(self, request):
+        """POST with mode=async queues a background job instead of blocking"""
+        if request.method != 'POST':
+            return False
+        return str(_request_param(request, 'mode', '')).lower() == 'async'
+
     def _get_mock_evaluation_data(self, file_id):
         """Provide mock data when file doesn't exist or processing fails"""
         mock_data = {
@@ -451,125 +856,376 @@ class BMDataEvaluationView(APIView):
         }
         return Response(mock_data, status=status.HTTP_200_OK)
 
-    def _parse_excel(self, file):
+
+class BatchEvaluationView(AnalysisParamsMixin, APIView):
+    """
+    Evaluate many logs in one request
+    - POST {file_ids: [...], plots?, group_by?, engine?}
+    - Ownership is checked with a single query
+    - Cache misses are analysed in parallel in a bounded process pool
+    - Returns per-file results, failures and the total wall-clock time
+    """
+    permission_classes = [IsAuthenticated]
+    # Overviews only need the statistics
+    default_plots = 'none'
+
+    def post(self, request):
+        started = time.perf_counter()
+
+        file_ids = request.data.get('file_ids')
+        if not isinstance(file_ids, list) or not file_ids:
+            return Response({'error': 'file_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            df = pd.read_excel(file, engine='openpyxl')
-            # No column filtering, keep all columns
-            return df
-        except Exception as e:
-            print(f"[Error parsing Excel file]: {e}")
-            return None
+            file_ids = list(dict.fromkeys(int(file_id) for file_id in file_ids))
+        except (TypeError, ValueError):
+            return Response({'error': 'file_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(file_ids) > settings.BATCH_EVALUATION_MAX_FILES:
+            return Response({
+                'error': f'At most {settings.BATCH_EVALUATION_MAX_FILES} files per batch'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-    def _safe_float(self, val):
         try:
-            f = float(val)
-            if math.isnan(f) or math.isinf(f):
-                return 0
-            return round(f, 6)
-        except Exception:
-            return 0
+            params = self._analysis_params(request)
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
 
-    def _analyze_data(self, df):
-        result = {}
+        # Performance: One ownership query for the whole batch
+        logs = {
+            log.id: log for log in UploadedLog.objects.filter(user=request.user, id__in=file_ids)
+        }
+        results, failed = evaluate_many([logs[i] for i in file_ids if i in logs], params)
+        for file_id in file_ids:
+            if file_id not in logs:
+                failed[file_id] = 'File not found'
 
-        timestamp_col = None
-        if 'timestamp' in df.columns:
-            timestamp_col = 'timestamp'
-        elif 'Timestamp' in df.columns:
-            timestamp_col = 'Timestamp'
-        else:
-            raise Exception("Required column 'timestamp' or 'Timestamp' not found in file.")
+        return Response({
+            'results': [results[i] for i in file_ids if i in results],
+            'failed': [{'file_id': i, 'error': failed[i]} for i in file_ids if i in failed],
+            'total': len(file_ids),
+            'wall_time_ms': round((time.perf_counter() - started) * 1000, 1),
+        }, status=status.HTTP_200_OK)
 
-        for msg_type, group in df.groupby("message_type"):
-            timestamps = group[timestamp_col].values
-            try:
-                times = [datetime.strptime(str(t), "%H:%M:%S.%f") for t in timestamps if str(t) != "0"]
-                if not times:
-                    seconds = []
-                else:
-                    base = times[0]
-                    seconds = [(t - base).total_seconds() for t in times]
-            except Exception:
-                seconds = pd.to_numeric(timestamps, errors='coerce')
-                seconds = seconds[seconds != 0]  # Remove zeros
-
-            if len(seconds) < 2:
-                result[msg_type] = {
-                    "average_periodicity": 0,
-                    "min_periodicity": 0,
-                    "max_periodicity": 0,
-                    "jitter_std_dev": 0,
-                    "periodicity_plot": None,
-                    "jitter_histogram": None
-                }
-                continue
 
-            intervals = np.diff(seconds)
-            intervals = intervals[~np.isnan(intervals)]
-            intervals = intervals[intervals != 0]  # Remove zero intervals
+class LogComparisonView(AnalysisParamsMixin, APIView):
+    """
+    Compare the periodicity of two or more logs
+    - GET ?file_ids=1,2[,...] or POST {file_ids: [...]}; the first log is the baseline
+    - Groups are aligned on ?group_by (default message_type and rt_address)
+    - Returns per-group deltas and histogram distances as (log x group) arrays
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return self._compare(request)
+
+    def post(self, request):
+        return self._compare(request)
+
+    def _compare(self, request):
+        started = time.perf_counter()
+        try:
+            file_ids = list(dict.fromkeys(int(file_id) for file_id in self._list_param(request, 'file_ids')))
+        except ValueError:
+            return Response({'error': 'file_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(file_ids) < 2:
+            return Response({'error': 'file_ids must list at least two logs'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(file_ids) > settings.BATCH_EVALUATION_MAX_FILES:
+            return Response({
+                'error': f'At most {settings.BATCH_EVALUATION_MAX_FILES} files per comparison'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-            if len(intervals) == 0:
-                avg_periodicity = min_periodicity = max_periodicity = jitter_std_dev = 0
+        # Performance: One ownership query for all the logs
+        logs = {
+            log.id: log for log in UploadedLog.objects.filter(user=request.user, id__in=file_ids)
+        }
+        missing = [file_id for file_id in file_ids if file_id not in logs]
+        if missing:
+            return Response({
+                'error': f"File not found: {', '.join(map(str, missing))}"
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        logs = [logs[file_id] for file_id in file_ids]
+        try:
+            comparison = compare_logs(logs, self._list_param(request, 'group_by') or None)
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except InvalidLogError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'files': [
+                {'file_id': log.id, 'filename': log.original_name or log.file.name} for log in logs
+            ],
+            'baseline': logs[0].id,
+            **comparison,
+            'wall_time_ms': round((time.perf_counter() - started) * 1000, 1),
+        }, status=status.HTTP_200_OK)
+
+
+class LogRowsView(APIView):
+    """
+    Paginated access to the rows of an uploaded log
+    - Cursor pagination (the cursor is a row position)
+    - Column projection with ?columns=a,b
+    - ?message_type=... filter
+    - ?stream=true returns every matching row as NDJSON
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 500
+    max_limit = 5000
+    stream_chunk_rows = 5000
+
+    def get(self, request, file_id):
+        try:
+            uploaded_log = UploadedLog.objects.get(id=file_id, user=request.user)
+        except UploadedLog.DoesNotExist:
+            return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            cursor = max(int(request.query_params.get('cursor', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            return Response({'error': 'cursor and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Performance: Only the page's rows and columns are read from the sidecar
+        log_rows = open_log_rows(uploaded_log)
+        if log_rows is None:
+            return Response({'error': 'Unable to read file rows'}, status=status.HTTP_400_BAD_REQUEST)
+        names, total_rows, read = log_rows
+
+        columns = list(names)
+        requested = _query_list(request, 'columns')
+        if requested:
+            by_name = {str(name): name for name in columns}
+            unknown = [name for name in requested if name not in by_name]
+            if unknown:
+                return Response({
+                    'error': f'Unknown columns: {", ".join(unknown)}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            columns = [by_name[name] for name in requested]
+
+        message_types = _query_list(request, 'message_type')
+        try:
+            if message_types:
+                if 'message_type' not in names:
+                    return Response({'error': "File has no 'message_type' column"}, status=status.HTTP_400_BAD_REQUEST)
+                message_type = read(['message_type'], None, categorical=['message_type'])['message_type']
+                positions = _matching_rows(message_type, message_types)
             else:
-                avg_periodicity = self._safe_float(np.mean(intervals))
-                min_periodicity = self._safe_float(np.min(intervals))
-                max_periodicity = self._safe_float(np.max(intervals))
-                jitter_std_dev = self._safe_float(np.std(intervals))
-
-            result[msg_type] = {
-                "average_periodicity": avg_periodicity,
-                "min_periodicity": min_periodicity,
-                "max_periodicity": max_periodicity,
-                "jitter_std_dev": jitter_std_dev,
-                "periodicity_plot": self._plot_timestamps(seconds, msg_type),
-                "jitter_histogram": self._plot_histogram(intervals, msg_type)
-            }
+                positions = np.arange(total_rows)
+        except InvalidLogError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return result
+        matching_rows = len(positions)
+        # Performance: Binary search to the cursor instead of scanning
+        positions = positions[np.searchsorted(positions, cursor):]
 
-    def _plot_timestamps(self, timestamps, label):
-        if len(timestamps) < 2:
-            return None
-        
-        plt.figure()
-        intervals = np.diff(timestamps)
-        plt.plot(range(len(intervals)), intervals, marker='o')
-        plt.title(f"Periodicity of {label}")
-        plt.xlabel("Occurrence")
-        plt.ylabel("Timestamp")
-        return self._encode_plot()
-
-    def _plot_histogram(self, intervals, label):
-        if len(intervals) < 1:
-            return None
-            
-        plt.figure()
-        plt.hist(intervals, bins=min(20, len(intervals)), edgecolor='black')
-        plt.title(f"Jitter Histogram: {label}")
-        plt.xlabel("Interval (s)")
-        plt.ylabel("Frequency")
-        return self._encode_plot()
-
-    def _encode_plot(self):
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png')
-        buffer.seek(0)
-        encoded = base64.b64encode(buffer.read()).decode('utf-8')
-        plt.close()
-        return f"data:image/png;base64,{encoded}"
-
-    def _sanitize_data(self, data):
-        """Recursively replace NaN/inf values with 0 in nested dictionaries and lists."""
-        if isinstance(data, dict):
-            return {k: self._sanitize_data(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._sanitize_data(item) for item in data]
-        elif isinstance(data, (float, np.float64, np.float32)):
-            if math.isnan(data) or math.isinf(data):
-                return 0
-            return data
+        if _query_flag(request, 'stream'):
+            response = StreamingHttpResponse(
+                self._stream_ndjson(read, columns, positions),
+                content_type='application/x-ndjson'
+            )
+            response['X-Total-Rows'] = str(len(positions))
+            return response
+
+        try:
+            page = read(columns, positions[:limit]).fillna(0)
+        except InvalidLogError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        next_cursor = int(positions[limit]) if len(positions) > limit else None
+
+        return Response({
+            'columns': columns,
+            'rows': page.to_dict(orient='records'),
+            'next_cursor': next_cursor,
+            'matching_rows': matching_rows,
+            'total_rows': total_rows,
+        }, status=status.HTTP_200_OK)
+
+    def _stream_ndjson(self, read, columns, positions):
+        for start in range(0, len(positions), self.stream_chunk_rows):
+            chunk = read(columns, positions[start:start + self.stream_chunk_rows])
+            text = chunk.to_json(orient='records', lines=True, date_format='iso')
+            yield text if text.endswith('\n') else text + '\n'
+
+
+class LogSegmentsView(APIView):
+    """
+    Incremental statistics of a growing log
+    - GET: merged statistics of the log and every appended segment
+    - POST: append a segment; only its rows are analysed and merged
+    """
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [IsAuthenticated]
+    max_size = 10 * 1024 * 1024  # 10MB, same as uploads
+
+    def get_throttles(self):
+        if self.request.method == 'POST':
+            return [FileUploadThrottle()]
+        return super().get_throttles()
+
+    def get(self, request, file_id):
+        try:
+            uploaded_log = UploadedLog.objects.get(id=file_id, user=request.user)
+        except UploadedLog.DoesNotExist:
+            return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            statistics = log_statistics(uploaded_log)
+        except Exception as e:
+            return Response({'error': f'Unable to analyse log: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self._payload(statistics), status=status.HTTP_200_OK)
+
+    def post(self, request, file_id):
+        try:
+            uploaded_log = UploadedLog.objects.get(id=file_id, user=request.user)
+        except UploadedLog.DoesNotExist:
+            return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if 'file' not in request.FILES:
+            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+        segment_file = request.FILES['file']
+        if segment_file.size > self.max_size:
+            return Response({
+                'error': f'File too large. Maximum size is {self.max_size // (1024*1024)}MB'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            check_log_format(segment_file.name, SEGMENT_EXTENSIONS, source=segment_file)
+        except UnsupportedArchive as e:
+            return Response({
+                'error': f'Unsupported segment type. {e}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            statistics, segment = append_segment(uploaded_log, segment_file)
+        except Exception as e:
+            return Response({'error': f'Unable to analyse segment: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        payload = self._payload(statistics)
+        payload['segment'] = {'id': segment.id, 'rows': segment.rows}
+        return Response(payload, status=status.HTTP_201_CREATED)
+
+    def _payload(self, statistics):
+        return statistics_payload(statistics)
+
+
+class FleetStatisticsView(AnalysisParamsMixin, APIView):
+    """
+    Statistics and tail percentiles per message type across many logs
+    - GET ?file_ids=1,2,... or POST {file_ids: [...]}
+    - Merged from each log's persisted statistics (built on first use)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return self._fleet(request)
+
+    def post(self, request):
+        return self._fleet(request)
+
+    def _fleet(self, request):
+        started = time.perf_counter()
+        try:
+            file_ids = list(dict.fromkeys(int(file_id) for file_id in self._list_param(request, 'file_ids')))
+        except ValueError:
+            return Response({'error': 'file_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        if not file_ids:
+            return Response({'error': 'file_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(file_ids) > settings.BATCH_EVALUATION_MAX_FILES:
+            return Response({
+                'error': f'At most {settings.BATCH_EVALUATION_MAX_FILES} files per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Performance: One ownership query for all the logs
+        logs = {
+            log.id: log for log in UploadedLog.objects.filter(user=request.user, id__in=file_ids)
+        }
+        missing = [file_id for file_id in file_ids if file_id not in logs]
+        if missing:
+            return Response({
+                'error': f"File not found: {', '.join(map(str, missing))}"
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            analysis, rows = fleet_statistics([logs[file_id] for file_id in file_ids])
+        except Exception as e:
+            return Response({'error': f'Unable to analyse logs: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'file_ids': file_ids,
+            'analysis': analysis,
+            'metadata': {'engine': 'incremental', 'rows': rows},
+            'wall_time_ms': round((time.perf_counter() - started) * 1000, 1),
+        }, status=status.HTTP_200_OK)
+
+
+class AnalysisSummaryView(APIView):
+    """
+    Query the stored per-group summaries across all of the user's logs
+    - ?message_type=a,b and ?rt_address=RT5 (or * for every RT; by default
+      the per message type rows)
+    - ?<metric>__gt|gte|lt|lte=value, e.g. ?jitter_std_dev__gt=0.002
+    - Matching rows (up to ?limit=) plus aggregates, each one SQL query
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 100
+    max_limit = 1000
+    lookups = ('gt', 'gte', 'lt', 'lte')
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        summaries = AnalysisSummary.objects.filter(log__user=request.user)
+        message_types = _query_list(request, 'message_type')
+        if message_types:
+            summaries = summaries.filter(message_type__in=message_types)
+        rt_addresses = _query_list(request, 'rt_address')
+        if '*' in rt_addresses:
+            summaries = summaries.exclude(rt_address='')
         else:
-            return data
+            summaries = summaries.filter(rt_address__in=rt_addresses or [''])
+
+        for name, value in request.query_params.items():
+            metric, _, lookup = name.rpartition('__')
+            if metric not in SUMMARY_METRICS or lookup not in self.lookups:
+                continue
+            try:
+                summaries = summaries.filter(**{f'{metric}__{lookup}': float(value)})
+            except ValueError:
+                return Response({'error': f'{name} must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Performance: Rows and aggregates come straight from the indexed table
+        fields = ['log_id', 'log__original_name', 'log__uploaded_at', 'message_type', 'rt_address', *SUMMARY_METRICS]
+        rows = list(
+            summaries.order_by('-log__uploaded_at', 'log_id', 'message_type', 'rt_address').values(*fields)[:limit + 1]
+        )
+        aggregate = summaries.aggregate(
+            logs=Count('log', distinct=True),
+            groups=Count('id'),
+            max_jitter_std_dev=Max('jitter_std_dev'),
+            mean_average_periodicity=Avg('average_periodicity'),
+            max_p99_periodicity=Max('p99_periodicity'),
+            max_p999_periodicity=Max('p999_periodicity'),
+        )
+
+        results = []
+        for row in rows[:limit]:
+            row['file_id'] = row.pop('log_id')
+            row['filename'] = row.pop('log__original_name')
+            row['uploaded_at'] = row.pop('log__uploaded_at').isoformat()
+            results.append(row)
+        return Response({
+            'results': results,
+            'truncated': len(rows) > limit,
+            'aggregate': aggregate,
+        }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -586,33 +1242,95 @@ def health_check(request):
     return JsonResponse({
         "status": "healthy",
         "database": db_status,
-        "endpoints": ["/api/register/", "/api/login/", "/api/upload/", "/api/evaluate/<id>/", "/api/files/", "/api/health/"]
+        "endpoints": [
+            "/api/register/", "/api/login/", "/api/upload/",
+            "/api/uploads/", "/api/uploads/<id>/", "/api/uploads/<id>/chunks/<index>/", "/api/uploads/<id>/complete/",
+            "/api/evaluate/<id>/", "/api/evaluate/batch/", "/api/evaluate/compare/",
+            "/api/evaluate/fleet/", "/api/evaluate/summaries/", "/api/jobs/<id>/",
+            "/api/files/", "/api/files/<id>/rows/", "/api/files/<id>/segments/", "/api/health/",
+        ]
     })
 
 
+LIST_FILES_DEFAULT_LIMIT = 50
+LIST_FILES_MAX_LIMIT = 200
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_files(request):
-    """Clean files list endpoint"""
+    """
+    Files of the current user, newest first
+    - Keyset pagination on (uploaded_at, id) over the (user, uploaded_at) index
+    - ?cursor= is the next_cursor of the previous page, ?limit= up to 200
+    - Size, row count and analysis state come from the row; files are never opened
+    - The user is the token's, so the page is the only query
+    """
     try:
-        files = UploadedLog.objects.filter(user=request.user).order_by('-uploaded_at')
-        files_data = []
-        
-        for file_obj in files:
-            files_data.append({
+        limit = min(max(int(request.GET.get('limit', LIST_FILES_DEFAULT_LIMIT)), 1), LIST_FILES_MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({"error": "limit must be an integer"}, status=400)
+
+    files = UploadedLog.objects.filter(user_id=request.user.id)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            uploaded_at, last_id = _decode_files_cursor(cursor)
+        except ValueError:
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+        files = files.filter(Q(uploaded_at__lt=uploaded_at) | Q(uploaded_at=uploaded_at, id__lt=last_id))
+
+    # Performance: Only the listed columns, one page (+1 to detect the next)
+    page = list(
+        files.order_by('-uploaded_at', '-id')
+        .only(
+            'id', 'original_name', 'file', 'uploaded_at', 'size', 'row_count', 'analysis_state', 'summary_state',
+        )[:limit + 1]
+    )
+    next_cursor = _encode_files_cursor(page[limit - 1]) if len(page) > limit else None
+    page = page[:limit]
+
+    return JsonResponse({
+        "files": [
+            {
                 "id": file_obj.id,
-                "filename": file_obj.filename,
+                "filename": file_obj.original_name or os.path.basename(file_obj.file.name),
                 "uploaded_at": file_obj.uploaded_at.isoformat(),
-                "status": "processed"
-            })
-        
-        return JsonResponse({
-            "files": files_data,
-            "total": len(files_data)
-        })
-        
-    except Exception as e:
-        return JsonResponse({
-            "error": "Failed to retrieve files",
-            "message": str(e)
-        }, status=500)
\ No newline at end of file
+                "size": file_obj.size,
+                "row_count": file_obj.row_count,
+                "status": file_obj.analysis_state,
+                "summary_status": file_obj.summary_state,
+            }
+            for file_obj in page
+        ],
+        "count": len(page),
+        # Every file of the user, as before pagination (one indexed COUNT)
+        "total": UploadedLog.objects.filter(user=request.user).count(),
+        "next_cursor": next_cursor,
+    })
+
+
+def _encode_files_cursor(file_obj):
+    raw = f"{file_obj.uploaded_at.isoformat()}|{file_obj.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_files_cursor(cursor):
+    """(uploaded_at, id) of the last file of the previous page; ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (binascii.Error, UnicodeError):
+        raise ValueError(cursor)
+    uploaded_at, _, last_id = raw.rpartition('|')
+    return datetime.fromisoformat(uploaded_at), int(last_id)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_status(request, job_id):
+    """Status of a background analysis job, with the result once done"""
+    try:
+        job = AnalysisJob.objects.get(id=job_id, user=request.user)
+    except AnalysisJob.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job_payload(job, include_result=True), status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+Process-pool helpers.
+
+This module must stay importable before Django is configured: spawned pool
+children unpickle the initializer before any app module can be loaded.
+"""
+
+
+def init_worker_process():
+    """Pool initializer: spawned children need their own Django setup"""
+    import django
+    django.setup()
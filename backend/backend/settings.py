@@ -232,10 +232,26 @@ except Exception as e:
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        # Performance: The user comes from the token claims, not a query per request
+        'analyzer.authentication.ClaimsJWTAuthentication',
+    ),
+    # Performance: orjson encodes numpy values and NaN natively
+    'DEFAULT_RENDERER_CLASSES': (
+        'analyzer.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+SIMPLE_JWT = {
+    # Refreshed access tokens carry the user's current profile claims
+    'TOKEN_REFRESH_SERIALIZER': 'analyzer.authentication.ClaimsTokenRefreshSerializer',
+}
+
+# Seconds a user's active flag and password hash are trusted from the cache
+# by token authentication; a deactivation or password change made in another
+# process is enforced after at most this long
+AUTH_USER_STATE_TTL = config('AUTH_USER_STATE_TTL', default=60, cast=int)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -290,6 +306,11 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # PERFORMANCE OPTIMIZATIONS
 # ===============================
 
+# Analysis result cache: entries above the per-item cap are never stored and
+# the least recently used results are evicted once the byte budget is spent
+ANALYSIS_CACHE_MAX_ITEM_BYTES = config('ANALYSIS_CACHE_MAX_ITEM_BYTES', default=8 * 1024 * 1024, cast=int)
+ANALYSIS_CACHE_MAX_BYTES = config('ANALYSIS_CACHE_MAX_BYTES', default=128 * 1024 * 1024, cast=int)
+
 # Cache Configuration - Simplified for production compatibility
 REDIS_URL = config('REDIS_URL', default=None)
 
@@ -305,7 +326,19 @@ if REDIS_URL:
             },
             'TIMEOUT': 300,
             'KEY_PREFIX': 'isro',
-        }
+        },
+        # Bounded by the Redis server itself: set maxmemory and
+        # maxmemory-policy allkeys-lru (ANALYSIS_CACHE_MAX_BYTES is local only)
+        'analysis': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                'IGNORE_EXCEPTIONS': True,
+            },
+            'TIMEOUT': 24 * 3600,
+            'KEY_PREFIX': 'isro-analysis',
+        },
     }
 else:
     # Fallback to local memory cache
@@ -318,9 +351,45 @@ else:
                 'MAX_ENTRIES': 1000,
                 'CULL_FREQUENCY': 3,
             }
-        }
+        },
+        'analysis': {
+            'BACKEND': 'analyzer.cache.BoundedLocMemCache',
+            'LOCATION': 'isro-analysis-cache',
+            'TIMEOUT': 24 * 3600,
+            'OPTIONS': {
+                'MAX_ENTRIES': 500,
+                'CULL_FREQUENCY': 3,
+                'MAX_BYTES': ANALYSIS_CACHE_MAX_BYTES,
+            }
+        },
     }
 
+# Logs at least this large are never parsed whole for analysis: only their
+# timestamp and group-key columns are read, in chunks
+COMPACT_PARSE_MIN_BYTES = config('COMPACT_PARSE_MIN_BYTES', default=256 * 1024 * 1024, cast=int)
+
+# Background analysis worker (manage.py run_analysis_worker)
+ANALYSIS_WORKER_PROCESSES = config('ANALYSIS_WORKER_PROCESSES', default=2, cast=int)
+
+# Gunicorn worker timeout (start.sh and render.yaml pass it as --timeout)
+WEB_TIMEOUT = config('WEB_TIMEOUT', default=120, cast=int)  # seconds
+
+# Batch evaluation (/api/evaluate/batch/): pool kept warm in each web process.
+# The deadline stays below WEB_TIMEOUT so partial results are returned before
+# gunicorn kills the worker
+BATCH_EVALUATION_PROCESSES = config('BATCH_EVALUATION_PROCESSES', default=2, cast=int)
+BATCH_EVALUATION_MAX_FILES = config('BATCH_EVALUATION_MAX_FILES', default=100, cast=int)
+BATCH_EVALUATION_TIMEOUT = config('BATCH_EVALUATION_TIMEOUT', default=max(WEB_TIMEOUT - 20, 1), cast=int)  # seconds
+
+# Chunked uploads (/api/uploads/): chunks are streamed to disk, so these
+# limits are independent of the in-memory upload limits below
+UPLOAD_CHUNK_SIZE = config('UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+UPLOAD_MAX_CHUNK_SIZE = config('UPLOAD_MAX_CHUNK_SIZE', default=64 * 1024 * 1024, cast=int)
+CHUNKED_UPLOAD_MAX_BYTES = config('CHUNKED_UPLOAD_MAX_BYTES', default=20 * 1024 ** 3, cast=int)
+UPLOAD_SESSION_TTL = config('UPLOAD_SESSION_TTL', default=24 * 3600, cast=int)  # seconds
+# Sessions still assembling after this long are taken to have crashed and reopened
+UPLOAD_ASSEMBLY_TIMEOUT = config('UPLOAD_ASSEMBLY_TIMEOUT', default=3600, cast=int)  # seconds
+
 # Security headers for performance
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -28,7 +28,7 @@ echo "🌐 Starting Gunicorn server..."
 exec gunicorn backend.wsgi:application \
     --bind 0.0.0.0:${PORT:-8000} \
     --workers 2 \
-    --timeout 120 \
+    --timeout ${WEB_TIMEOUT:-120} \
     --max-requests 1000 \
     --max-requests-jitter 100 \
     --preload \